@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Ad
 from .serializers import AdSerializer
+from user.roles import is_admin
 import random
 
 
@@ -16,10 +17,7 @@ class IsAdminGroup(permissions.BasePermission):
             return True  # Allow GET requests for all users
 
         # Check if the user is in the 'admin' group
-        return (
-            request.user.is_authenticated
-            and request.user.groups.filter(name="admin").exists()
-        )
+        return is_admin(request.user)
 
 
 class AdViewSet(viewsets.ModelViewSet):
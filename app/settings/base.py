@@ -68,6 +68,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "bill.middleware.LegiscanStaleMiddleware",
     # Third Party Middleware:
     "allauth.account.middleware.AccountMiddleware",
 ]
@@ -135,6 +136,27 @@ USE_TZ = True
 STATIC_URL = "static/"
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "default",
+    },
+    "legiscan": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "legiscan",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# Seconds to cache each user's groups for permission checks
+USER_ROLES_CACHE_TTL = int(os.getenv("USER_ROLES_CACHE_TTL", 60 * 5))
+# Seconds to cache the user of each API token
+AUTH_TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", 60 * 5))
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -148,8 +170,9 @@ AUTH_USER_MODEL = "user.User"
 # DRF
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
-    ]
+        "authentication.backends.CachedTokenAuthentication",
+    ],
+    "EXCEPTION_HANDLER": "bill.exceptions.legiscan_exception_handler",
 }
 
 REST_AUTH_REGISTER_SERIALIZERS = {
@@ -196,6 +219,43 @@ PROJECT_NAME = "Arkleg Bill Tracker"
 # LEGISCAN
 LEGISCAN_API_KEY = os.getenv("LEGISCAN_API_KEY")
 LEGISCAN_STATE = "AR"
+# Point at a local stub (see the legiscan_stub command) to run offline
+LEGISCAN_BASE_URL = os.getenv("LEGISCAN_BASE_URL", "https://api.legiscan.com/")
+LEGISCAN_POOL_SIZE = int(os.getenv("LEGISCAN_POOL_SIZE", 10))
+LEGISCAN_CONNECT_TIMEOUT = float(os.getenv("LEGISCAN_CONNECT_TIMEOUT", 3.05))
+LEGISCAN_READ_TIMEOUT = float(os.getenv("LEGISCAN_READ_TIMEOUT", 15))
+# Requests allowed per month and per second across all processes, and
+# seconds a request may wait for the rate limit before failing fast
+LEGISCAN_MONTHLY_QUOTA = int(os.getenv("LEGISCAN_MONTHLY_QUOTA", 30000))
+LEGISCAN_RATE_LIMIT = int(os.getenv("LEGISCAN_RATE_LIMIT", 10))
+LEGISCAN_RATE_MAX_WAIT = float(os.getenv("LEGISCAN_RATE_MAX_WAIT", 2))
+# Concurrent searches and searches per second when fanning out keywords;
+# the rate stays below LEGISCAN_RATE_LIMIT to leave room for web requests
+LEGISCAN_SEARCH_CONCURRENCY = int(os.getenv("LEGISCAN_SEARCH_CONCURRENCY", 8))
+LEGISCAN_SEARCH_RATE = float(os.getenv("LEGISCAN_SEARCH_RATE", LEGISCAN_RATE_LIMIT / 2))
+LEGISCAN_CACHE_ALIAS = "legiscan"
+# Seconds to wait for another process already fetching the same payload
+LEGISCAN_COALESCE_WAIT = float(os.getenv("LEGISCAN_COALESCE_WAIT", 5))
+# Seconds to cache each Legiscan operation; ops not listed are not cached.
+LEGISCAN_CACHE_TTLS = {
+    "getSessionList": 60 * 60 * 6,
+    "getSessionPeople": 60 * 60 * 6,
+    "getSponsoredList": 60 * 60,
+    "getMasterList": 60 * 10,
+    "getMasterListRaw": 60 * 10,
+    "getSearch": 60 * 15,
+    "getBill": 60 * 15,
+}
+# getBill responses requested with a known change_hash
+LEGISCAN_CACHE_HASH_TTL = 60 * 60 * 24 * 7
+# Seconds to keep last-known-good payloads to serve during outages
+LEGISCAN_CACHE_STALE_TTL = 60 * 60 * 24 * 7
+# Consecutive failures opening the circuit, and seconds before probing
+LEGISCAN_BREAKER_THRESHOLD = int(os.getenv("LEGISCAN_BREAKER_THRESHOLD", 5))
+LEGISCAN_BREAKER_RESET = float(os.getenv("LEGISCAN_BREAKER_RESET", 30))
+# Seconds before a mirrored bill is refreshed in the background; longer
+# than BILL_SYNC_INTERVAL, so that bills the sync keeps current are not
+BILL_MIRROR_STALE_AFTER = int(os.getenv("BILL_MIRROR_STALE_AFTER", 60 * 60 * 2))
 print("LEGISCAN_API_KEY ", LEGISCAN_API_KEY)
 
 # Django Q
@@ -220,6 +280,14 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+# Seconds between syncs of the local bill mirror
+BILL_SYNC_INTERVAL = int(os.getenv("BILL_SYNC_INTERVAL", 60 * 60))
+CELERY_BEAT_SCHEDULE = {
+    "sync-bills": {
+        "task": "bill.tasks.sync_bills_task",
+        "schedule": BILL_SYNC_INTERVAL,
+    },
+}
 
 # Logging
 LOGGING = {
@@ -57,6 +57,22 @@ DATABASES = {
 }
 
 
+# Cache
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL", "redis://localhost:6379/1")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_CACHE_URL,
+    },
+    "legiscan": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_CACHE_URL,
+        "KEY_PREFIX": "legiscan",
+    },
+}
+
+
 # ALLAUTH - verify through email
 ACCOUNT_EMAIL_VERIFICATION = True  # Always verify through email
 # <EMAIL_CONFIRM_REDIRECT_BASE_URL>/<key>
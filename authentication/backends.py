@@ -0,0 +1,100 @@
+"""
+Token authentication with cached token lookups.
+
+TokenAuthentication loads the token and its user on every request.
+CachedTokenAuthentication keeps the user of each valid token in the
+cache for AUTH_TOKEN_CACHE_TTL seconds instead. Only the user's field
+values are cached, without the password hash; users rebuilt from the
+cache load the password on access and never save it back. Cached users
+are dropped as soon as the token is deleted (e.g. on logout) or the user
+is saved (e.g. deactivated), so only changes that bypass model signals,
+such as queryset updates, can go unnoticed, and only until the TTL runs
+out.
+"""
+
+import hashlib
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+User = get_user_model()
+
+KEY_PREFIX = "auth-token"
+# Credentials never go into the shared cache
+UNCACHED_FIELDS = {"password"}
+
+
+def token_cache_key(key: str) -> str:
+    # Tokens are credentials, so only their digest goes into cache keys
+    return f"{KEY_PREFIX}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def user_cache_key(user_id) -> str:
+    """Where the cache key of the user's token is kept, for invalidation."""
+    return f"{KEY_PREFIX}:user:{user_id}"
+
+
+def dump_user(user) -> dict:
+    """Cacheable field values of user, without credentials."""
+    return {
+        field.attname: field.get_prep_value(getattr(user, field.attname))
+        for field in user._meta.concrete_fields
+        if field.attname not in UNCACHED_FIELDS
+    }
+
+
+def load_user(fields: dict):
+    """A user from dump_user values, with the uncached fields deferred."""
+    return User.from_db(router.db_for_read(User), list(fields), list(fields.values()))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that caches token to user resolution."""
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        fields = cache.get(cache_key)
+        if fields is not None:
+            user = load_user(fields)
+            return user, self.get_model()(key=key, user=user)
+
+        user, token = super().authenticate_credentials(key)
+        cache.set_many(
+            {cache_key: dump_user(user), user_cache_key(user.pk): cache_key},
+            settings.AUTH_TOKEN_CACHE_TTL,
+        )
+        return user, token
+
+
+def get_token_user(key: str) -> Optional[User]:
+    """The active user of token key, or None for an invalid token."""
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(key)
+    except AuthenticationFailed:
+        return None
+    return user
+
+
+def forget_user(user_id) -> None:
+    """Drop the cached token lookup of a user."""
+    key = user_cache_key(user_id)
+    cache_key = cache.get(key)
+    cache.delete_many([key, cache_key] if cache_key else [key])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    cache.delete_many([token_cache_key(instance.key), user_cache_key(instance.user_id)])
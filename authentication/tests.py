@@ -1 +1,82 @@
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .backends import get_token_user, token_cache_key
+
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="user@example.com", password="pw")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_is_cached(self):
+        self.assertEqual(self.client.get("/api/user/profile/").status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/user/profile/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["email"], "user@example.com")
+
+    def test_invalid_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        response = self.client.get("/api/user/profile/")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertIsNone(get_token_user("invalid"))
+
+    def test_logout_invalidates(self):
+        self.assertEqual(get_token_user(self.token.key), self.user)
+
+        response = self.client.post("/api/auth/logout/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(get_token_user(self.token.key))
+        self.assertEqual(self.client.get("/api/user/profile/").status_code, 401)
+
+    def test_deactivation_invalidates(self):
+        self.assertEqual(get_token_user(self.token.key), self.user)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(get_token_user(self.token.key))
+        self.assertEqual(self.client.get("/api/user/profile/").status_code, 401)
+
+    def test_profile_changes_are_not_served_stale(self):
+        self.client.get("/api/user/profile/")
+
+        self.client.patch("/api/user/profile/", {"first_name": "Ann"}, format="json")
+        response = self.client.get("/api/user/profile/")
+
+        self.assertEqual(response.data["first_name"], "Ann")
+
+    def test_password_is_not_cached(self):
+        get_token_user(self.token.key)
+
+        cached = cache.get(token_cache_key(self.token.key))
+
+        self.assertEqual(cached["email"], "user@example.com")
+        self.assertNotIn("password", cached)
+        user = get_token_user(self.token.key)
+        self.assertTrue(user.check_password("pw"))
+
+    def test_saving_a_cached_user_keeps_the_password(self):
+        get_token_user(self.token.key)
+        user = get_token_user(self.token.key)
+
+        user.first_name = "Ann"
+        user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Ann")
+        self.assertTrue(self.user.check_password("pw"))
@@ -1,6 +1,14 @@
 from django.contrib import admin
 
-from .models import Bill, UserBillInteraction, UserKeyword, BillAnalysis
+from .models import (
+    Bill,
+    UserBillInteraction,
+    UserKeyword,
+    BillAnalysis,
+    DigestDelivery,
+    LegiscanUsage,
+)
+from .quota import LegiscanQuota
 
 
 @admin.register(Bill)
@@ -34,3 +42,26 @@ class BillAnalysisAdmin(admin.ModelAdmin):
         return obj.file.name if obj.file else "No file"
 
     file_name.short_description = "File Name"
+
+
+@admin.register(DigestDelivery)
+class DigestDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("user", "legiscan_bill_id", "change_hash", "delivered_at")
+    search_fields = ("legiscan_bill_id", "user__email")
+    ordering = ("-delivered_at",)
+
+
+@admin.register(LegiscanUsage)
+class LegiscanUsageAdmin(admin.ModelAdmin):
+    list_display = ("date", "op", "count")
+    list_filter = ("op",)
+    date_hierarchy = "date"
+
+    def changelist_view(self, request, extra_context=None):
+        quota = LegiscanQuota.from_settings()
+        self.message_user(
+            request,
+            f"Legiscan requests this month: {quota.month_count()} "
+            f"of {quota.monthly_quota or 'unlimited'}",
+        )
+        return super().changelist_view(request, extra_context)
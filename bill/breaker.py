@@ -0,0 +1,83 @@
+"""Legiscan circuit breaker."""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "legiscan:breaker"
+
+
+class CircuitBreaker:
+    """
+    Process-shared circuit breaker for Legiscan.
+
+    The circuit opens after `failure_threshold` consecutive failures and
+    requests are refused while it is open. After `reset_timeout` seconds
+    the first caller is let through as the probe (half-open); the circuit
+    closes when its request succeeds and stays open for another
+    `reset_timeout` when it fails. If the probe reports neither, another
+    caller is let through once `reset_timeout` has passed again. State
+    lives in the shared cache so every worker trips and recovers together.
+    """
+
+    def __init__(self, alias: str, failure_threshold: int, reset_timeout: float):
+        self.alias = alias
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    @classmethod
+    def from_settings(cls) -> "CircuitBreaker":
+        """Build a breaker configured from django settings."""
+        return cls(
+            alias=settings.LEGISCAN_CACHE_ALIAS,
+            failure_threshold=settings.LEGISCAN_BREAKER_THRESHOLD,
+            reset_timeout=settings.LEGISCAN_BREAKER_RESET,
+        )
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    @property
+    def opened_at(self):
+        return self.backend.get(f"{KEY_PREFIX}:opened_at")
+
+    def is_open(self) -> bool:
+        """Whether requests are currently refused."""
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a request may be made, either as usual or as the probe."""
+        opened_at = self.opened_at
+        if opened_at is None:
+            return True
+
+        return time.time() - opened_at >= self.reset_timeout and self.backend.add(
+            f"{KEY_PREFIX}:probe", 1, timeout=self.reset_timeout
+        )
+
+    def record_success(self) -> None:
+        """Close the circuit and reset the failure count."""
+        self.backend.delete_many([f"{KEY_PREFIX}:failures", f"{KEY_PREFIX}:opened_at"])
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold."""
+        key = f"{KEY_PREFIX}:failures"
+        if self.backend.add(key, 1, timeout=None):
+            failures = 1
+        else:
+            failures = self.backend.incr(key)
+
+        if failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self) -> None:
+        """Open the circuit for another reset_timeout."""
+        if not self.is_open():
+            logger.warning("Legiscan circuit opened")
+        self.backend.set(f"{KEY_PREFIX}:opened_at", time.time(), timeout=None)
+        self.backend.delete(f"{KEY_PREFIX}:probe")
@@ -0,0 +1,136 @@
+"""Legiscan response cache."""
+
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "legiscan"
+
+
+class LegiscanCache:
+    """
+    TTL cache for Legiscan responses.
+
+    Entries are keyed by (op, params) and expire after a per-operation
+    TTL. Operations without a configured TTL are never cached. A
+    last-known-good copy of each entry is kept for `stale_ttl` to serve
+    while Legiscan is unavailable. Hit and
+    miss counters are kept in the cache backend itself so they are
+    shared by every process using it.
+    """
+
+    def __init__(
+        self,
+        alias: str,
+        ttls: dict,
+        hash_ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ):
+        self.alias = alias
+        self.ttls = ttls
+        self.hash_ttl = hash_ttl
+        self.stale_ttl = stale_ttl
+
+    @classmethod
+    def from_settings(cls) -> "LegiscanCache":
+        """Build a cache configured from django settings."""
+        return cls(
+            alias=settings.LEGISCAN_CACHE_ALIAS,
+            ttls=settings.LEGISCAN_CACHE_TTLS,
+            hash_ttl=settings.LEGISCAN_CACHE_HASH_TTL,
+            stale_ttl=settings.LEGISCAN_CACHE_STALE_TTL,
+        )
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def is_cached(self, op: str) -> bool:
+        """Whether responses for op are cached."""
+        return op in self.ttls
+
+    def key(self, op: str, params: dict) -> str:
+        """Build the cache key for an operation and its parameters."""
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"{KEY_PREFIX}:{op}:{digest}"
+
+    def get(self, op: str, params: dict) -> Optional[dict]:
+        """Return the cached payload for (op, params), or None."""
+        if not self.is_cached(op):
+            return None
+
+        payload = self.backend.get(self.key(op, params))
+        self._count(op, "hits" if payload is not None else "misses")
+        return payload
+
+    def set(
+        self, op: str, params: dict, payload: dict, ttl: Optional[int] = None
+    ) -> None:
+        """Store a payload for (op, params)."""
+        if not self.is_cached(op):
+            return
+
+        key = self.key(op, params)
+        self.backend.set(key, payload, ttl or self.ttls[op])
+        if self.stale_ttl:
+            self.backend.set(f"{key}:stale", payload, self.stale_ttl)
+
+    def stale(self, op: str, params: dict) -> Optional[dict]:
+        """Return the last-known-good payload for (op, params), or None."""
+        if not self.is_cached(op) or not self.stale_ttl:
+            return None
+
+        return self.backend.get(f"{self.key(op, params)}:stale")
+
+    def peek(self, op: str, params: dict) -> Optional[dict]:
+        """Like get, without counting a hit or miss."""
+        return self.backend.get(self.key(op, params))
+
+    def lock(self, op: str, params: dict, timeout: float) -> bool:
+        """
+        Claim the right to fetch (op, params) for up to timeout seconds.
+
+        Returns False when another process already holds the claim.
+        """
+        return self.backend.add(f"{self.key(op, params)}:lock", 1, timeout=timeout)
+
+    def unlock(self, op: str, params: dict) -> None:
+        """Release a claim taken with lock."""
+        self.backend.delete(f"{self.key(op, params)}:lock")
+
+    def delete(self, op: str, params: dict) -> None:
+        """Drop the cached payload for (op, params)."""
+        self.backend.delete(self.key(op, params))
+
+    def _stat_key(self, op: str, kind: str) -> str:
+        return f"{KEY_PREFIX}:stats:{op}:{kind}"
+
+    def _count(self, op: str, kind: str) -> None:
+        key = self._stat_key(op, kind)
+        try:
+            self.backend.incr(key)
+        except ValueError:
+            # Counter missing (first use or evicted).
+            if not self.backend.add(key, 1, timeout=None):
+                self.backend.incr(key)
+
+    def stats(self) -> dict:
+        """Return {op: {"hits": n, "misses": n}} for every cached op."""
+        keys = {
+            (op, kind): self._stat_key(op, kind)
+            for op in self.ttls
+            for kind in ("hits", "misses")
+        }
+        values = self.backend.get_many(keys.values())
+        return {
+            op: {kind: values.get(keys[(op, kind)], 0) for kind in ("hits", "misses")}
+            for op in self.ttls
+        }
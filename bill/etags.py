@@ -0,0 +1,63 @@
+"""
+Strong ETags for conditional GETs.
+
+Views compute an ETag from what their response is built from (e.g. a
+bill's change_hash) before building it, and answer a matching
+If-None-Match with a 304 straight away.
+"""
+
+import hashlib
+import json
+from typing import Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def make_etag(*parts) -> str:
+    """Strong, quoted ETag of JSON-serializable parts."""
+    data = json.dumps(parts, cls=DjangoJSONEncoder, sort_keys=True)
+    return quote_etag(hashlib.sha1(data.encode()).hexdigest())
+
+
+def not_modified(request, etag: str) -> Optional[HttpResponse]:
+    """
+    A 304 response if the request's If-None-Match matches etag, else None.
+
+    Also answers a 412 for a failing If-Match, like Django's condition
+    decorator.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+    return response
+
+
+def bill_etag(bill) -> str:
+    """
+    ETag of a mirrored bill's detail response.
+
+    Covers the Legiscan data through its change_hash, the admin fields,
+    and the caller's interaction (see BillDetailView) through its
+    modification time.
+    """
+    interaction = getattr(bill, "user_interaction", None)
+    return make_etag(
+        bill.legiscan_bill_id,
+        bill.change_hash,
+        bill.admin_note,
+        bill.admin_stance,
+        bill.admin_expanded_analysis_url,
+        interaction and [interaction.pk, interaction.modified],
+    )
+
+
+def master_list_etag(version: str, params) -> str:
+    """
+    ETag of a master list response for the given query parameters.
+
+    Covers every bill through version, see filters.master_list_version.
+    """
+    return make_etag(version, sorted(params.lists()))
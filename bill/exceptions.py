@@ -0,0 +1,49 @@
+"""Bill exceptions."""
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+
+class LegiscanError(Exception):
+    """Raised when a Legiscan request fails."""
+
+
+class LegiscanUnavailable(LegiscanError):
+    """
+    Raised without calling Legiscan when a request must not be made.
+
+    Callers should fail fast instead of retrying.
+    """
+
+    retry_after: int = 60
+
+
+class QuotaExhausted(LegiscanUnavailable):
+    """The monthly Legiscan query quota is used up."""
+
+    retry_after = 60 * 60
+
+
+class RateLimited(LegiscanUnavailable):
+    """Too many Legiscan requests per second across all processes."""
+
+    retry_after = 1
+
+
+class CircuitOpen(LegiscanUnavailable):
+    """Legiscan is failing, requests are refused until a probe succeeds."""
+
+    retry_after = 30
+
+
+def legiscan_exception_handler(exc, context):
+    """DRF exception handler answering 503 when Legiscan is unavailable."""
+    if isinstance(exc, LegiscanUnavailable):
+        return Response(
+            {"error": str(exc)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    return exception_handler(exc, context)
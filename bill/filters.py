@@ -1,51 +1,263 @@
+import hashlib
 import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date
+from heapq import merge
+from typing import Callable, Iterable, Optional, Union
 
 BILL_NUMBER_KEY = "bill_number"
+# getMasterList bills carry their bill number under "number"
+MASTER_LIST_NUMBER_KEY = "number"
+
+# Leading letters (chamber + type, e.g. "HJR") and the rest (e.g. "20")
+BILL_NUMBER_RE = re.compile(r"([A-Z]*)(.*)", re.DOTALL)
+SEARCH_TERM_RE = re.compile(r"^(H|S)?(B|R|JR)?(\d+)?$", re.IGNORECASE)
+
+CHAMBER_PREFIXES = {
+    "House": "H",  # HB, HR, HJR, etc.
+    "Senate": "S",  # SB, SR, SJR, etc.
+}
+TYPE_PREFIXES = {
+    "Bill": "B",  # HB, SB (House Bill, Senate Bill)
+    "Resolution": "R",  # HR, SR (House Resolution, Senate Resolution)
+    "Joint Resolution": "JR",  # HJR, SJR (House/Senate Joint Resolution)
+}
+
+# Above every character, so (term, term + MAX_CHAR) spans all keys starting with term
+MAX_CHAR = chr(0x10FFFF)
+
+# Parameters of filter_master_list answered by the bill number index
+NUMBER_PARAMS = ("chamber", "type", "bill_number")
+# Master list indexes kept per process, see master_list_index
+MASTER_LIST_INDEXES = 8
+
+
+class BillNumberIndex:
+    """
+    Bills indexed by their parsed bill number.
+
+    Bill numbers are parsed once into their letter prefix (e.g. "HJR")
+    and the rest (e.g. "20"). Bills are grouped by prefix, and every
+    suffix of the rest is kept in a sorted array, so that chamber, type
+    and number queries touch the few prefix groups and the matching
+    suffixes instead of every bill.
+
+    Building one costs more than a single linear scan, so build it once
+    per list of bills and pass it to the filter functions in place of the
+    list; master_list_index does so for getMasterList payloads. Results
+    keep the order of the bills.
+    """
+
+    def __init__(self, bills: Iterable[dict], key: str = BILL_NUMBER_KEY):
+        self.bills = list(bills)
+        self.key = key
+        self.groups: dict[str, array] = {}
+        suffixes = []
+
+        for position, bill in enumerate(self.bills):
+            prefix, rest = BILL_NUMBER_RE.match(bill.get(key) or "").groups()
+            self.groups.setdefault(prefix, array("I")).append(position)
+            suffixes.extend((rest[i:], position) for i in range(len(rest)))
+
+        suffixes.sort()
+        self.suffixes = [suffix for suffix, _ in suffixes]
+        self.suffix_positions = array("I", (position for _, position in suffixes))
+
+    def __len__(self):
+        return len(self.bills)
+
+    def filter(
+        self,
+        prefix_matches: Callable[[str], bool],
+        number_matches: Optional[Callable[[str], bool]] = None,
+        contains: Optional[str] = None,
+    ) -> list:
+        """
+        Bills whose prefix group passes prefix_matches.
+
+        Bills without a letter prefix are checked one by one with
+        number_matches instead, if given. With contains, only bills whose
+        number contains it (after the prefix) are kept.
+        """
+        groups = [
+            positions
+            for prefix, positions in self.groups.items()
+            if prefix and prefix_matches(prefix)
+        ]
+        if number_matches and "" in self.groups:
+            groups.append(
+                array(
+                    "I",
+                    (
+                        position
+                        for position in self.groups[""]
+                        if number_matches(self.bills[position].get(self.key) or "")
+                    ),
+                )
+            )
+
+        positions: Iterable[int] = merge(*groups)
+        if contains:
+            positions = sorted(self.containing(contains).intersection(positions))
+
+        return [self.bills[position] for position in positions]
+
+    def containing(self, term: str) -> set:
+        """Positions of bills whose number contains term after the prefix."""
+        start = bisect_left(self.suffixes, term)
+        end = bisect_left(self.suffixes, term + MAX_CHAR, lo=start)
+        return set(self.suffix_positions[start:end])
+
+
+def as_index(bills: Union[BillNumberIndex, Iterable[dict]]) -> BillNumberIndex:
+    if isinstance(bills, BillNumberIndex):
+        return bills
+    return BillNumberIndex(bills)
+
+
+_master_list_indexes: "OrderedDict[str, BillNumberIndex]" = OrderedDict()
+_master_list_lock = threading.Lock()
+
+
+def master_list_version(master_list: dict) -> str:
+    """
+    Fingerprint of a getMasterList payload.
+
+    Covers the session and every bill's id and change_hash, so it changes
+    whenever any bill does. Views compute it once per request and share
+    it between the ETag (see etags.master_list_etag) and the index.
+    """
+    bills = hashlib.sha1(
+        "|".join(
+            f"{bill.get('bill_id')}:{bill.get('change_hash')}"
+            for key, bill in master_list.items()
+            if key != "session"
+        ).encode()
+    ).hexdigest()
+    return f"{master_list.get('session')!r}|{bills}"
+
+
+def master_list_index(
+    master_list: dict, version: Optional[str] = None
+) -> BillNumberIndex:
+    """
+    The BillNumberIndex of a getMasterList payload's bills.
+
+    Indexes are memoized per process by master_list_version, so pages and
+    filters of an unchanged master list share one index. The last
+    MASTER_LIST_INDEXES are kept.
+    """
+    version = version or master_list_version(master_list)
+
+    with _master_list_lock:
+        index = _master_list_indexes.get(version)
+        if index is not None:
+            _master_list_indexes.move_to_end(version)
+            return index
+
+    index = BillNumberIndex(
+        (bill for key, bill in master_list.items() if key != "session"),
+        key=MASTER_LIST_NUMBER_KEY,
+    )
+    with _master_list_lock:
+        _master_list_indexes[version] = index
+        while len(_master_list_indexes) > MASTER_LIST_INDEXES:
+            _master_list_indexes.popitem(last=False)
+    return index
+
+
+def master_list_bills(
+    master_list: dict, params, version: Optional[str] = None
+) -> Union[BillNumberIndex, list]:
+    """
+    The bills of a getMasterList payload, to pass to filter_master_list.
+
+    The memoized index when params filter on bill numbers, else a list.
+    """
+    if any(params.get(name) for name in NUMBER_PARAMS):
+        return master_list_index(master_list, version)
+    return [bill for key, bill in master_list.items() if key != "session"]
+
+
+def filter_bills(bills, chamber=None, bill_type=None, search_term=None):
+    """
+    Filter bills on chamber, type and bill number at once.
+
+    Arguments are as for filter_by_chamber, filter_by_type and
+    search_by_bill_number; bills must pass every one given.
+
+    :param bills: List of bill dictionaries with 'number' keys, or a BillNumberIndex.
+    :return: List of matching bills.
+    """
+    prefix_checks = []
+    term_chamber = term_type = ""
+    digits = None
+
+    if chamber:
+        letter = CHAMBER_PREFIXES.get(chamber)
+        if letter is None:
+            return []
+        prefix_checks.append(lambda prefix: len(prefix) > 1 and prefix[0] == letter)
+
+    if bill_type:
+        letters = TYPE_PREFIXES.get(bill_type)
+        if letters is None:
+            return []
+        prefix_checks.append(
+            lambda prefix: prefix[0] in "HS" and prefix[1:].startswith(letters)
+        )
+
+    if search_term:
+        match = SEARCH_TERM_RE.match(search_term)
+        if not match:
+            return []
+
+        term_chamber, term_type, digits = match.groups()
+        term_chamber = term_chamber.upper() if term_chamber else ""
+        term_type = term_type.upper() if term_type else ""
+        prefix_checks.append(
+            lambda prefix: prefix.startswith(term_chamber)
+            and prefix[1:].startswith(term_type)
+        )
+
+    def bare_number_matches(number):
+        return not term_chamber and number[1:].startswith(term_type)
+
+    return as_index(bills).filter(
+        lambda prefix: all(check(prefix) for check in prefix_checks),
+        # Bills without a letter prefix never match a chamber or type
+        None if chamber or bill_type else bare_number_matches,
+        contains=digits,
+    )
 
 
 def filter_by_chamber(chamber, bills):
     """
     Filter bills based on the chamber (House or Senate) using bill_number prefixes.
 
-    :param bills: List of bill dictionaries with 'number' keys.
+    :param bills: List of bill dictionaries with 'number' keys, or a BillNumberIndex.
     :param chamber: "House" or "Senate".
     :return: Filtered list of bills belonging to the specified chamber.
     """
-    chamber_patterns = {
-        "House": re.compile(r"^H[A-Z]+"),  # Matches HB, HR, HJR, etc.
-        "Senate": re.compile(r"^S[A-Z]+"),  # Matches SB, SR, SJR, etc.
-    }
-
-    pattern = chamber_patterns.get(chamber)
-    return [
-        bill for bill in bills if pattern.match(bill.get(BILL_NUMBER_KEY, ""))
-    ]
+    if chamber not in CHAMBER_PREFIXES:
+        return []
+    return filter_bills(bills, chamber=chamber)
 
 
 def filter_by_type(bill_type, bills):
     """
     Filter bills based on type using bill_number prefixes.
 
-    :param bills: List of bill dictionaries with 'number' keys.
+    :param bills: List of bill dictionaries with 'number' keys, or a BillNumberIndex.
     :param bill_type: "Bill", "Resolution", or "Joint Resolution".
     :return: Filtered list of bills belonging to the specified type.
     """
-    type_patterns = {
-        "Bill": re.compile(
-            r"^[HS]B"
-        ),  # Matches HB, SB (House Bill, Senate Bill)
-        "Resolution": re.compile(
-            r"^[HS]R"
-        ),  # Matches HR, SR (House Resolution, Senate Resolution)
-        "Joint Resolution": re.compile(
-            r"^[HS]JR"
-        ),  # Matches HJR, SJR (House/Senate Joint Resolution)
-    }
-
-    pattern = type_patterns.get(bill_type)
-    return [
-        bill for bill in bills if pattern.match(bill.get(BILL_NUMBER_KEY, ""))
-    ]
+    if bill_type not in TYPE_PREFIXES:
+        return []
+    return filter_bills(bills, bill_type=bill_type)
 
 
 def search_by_bill_number(search_term, bills):
@@ -55,36 +267,100 @@ def search_by_bill_number(search_term, bills):
     - Supports chamber (H/S) and type (B/R/JR).
     - Returns all reasonable matches.
 
-    :param bills: List of bill dictionaries with 'number' keys.
+    :param bills: List of bill dictionaries with 'number' keys, or a BillNumberIndex.
     :param search_term: The search input (e.g., 'HB100', 'SJR20', '200').
     :return: List of matching bills.
     """
+    if not SEARCH_TERM_RE.match(search_term):
+        return []
+    return filter_bills(bills, search_term=search_term)
 
-    # Regex pattern to extract chamber, type, and digits
-    match = re.match(r"^(H|S)?(B|R|JR)?(\d+)?$", search_term, re.IGNORECASE)
 
-    if not match:
-        return []
+def filter_master_list(bills, params) -> list:
+    """
+    Filter getMasterList bills by query parameters.
 
-    chamber, bill_type, digits = match.groups()
+    - chamber: "House" or "Senate"
+    - type: "Bill", "Resolution" or "Joint Resolution"
+    - bill_number: As for search_by_bill_number (e.g. "HB100", "200")
+    - status: Comma separated Legiscan status codes (e.g. "1,2")
+    - from_date, to_date: Inclusive last action date range (YYYY-MM-DD)
 
-    return list(
-        filter(
-            lambda bill: (
-                (
-                    not chamber
-                    or bill.get(BILL_NUMBER_KEY, "").startswith(
-                        chamber.upper()
-                    )
-                )
-                and (
-                    not bill_type
-                    or bill.get(BILL_NUMBER_KEY, "")[1:].startswith(
-                        bill_type.upper()
-                    )
-                )
-                and (not digits or digits in bill.get(BILL_NUMBER_KEY, ""))
-            ),
-            bills,
-        )
-    )
+    Raises ValueError for invalid parameters.
+
+    :param bills: List of master list bill dictionaries, or a BillNumberIndex
+        built with key=MASTER_LIST_NUMBER_KEY (see master_list_bills).
+    :param params: Mapping of query parameters.
+    :return: List of matching bills, in master list order.
+    """
+    chamber = params.get("chamber")
+    bill_type = params.get("type")
+    search_term = params.get("bill_number")
+
+    if chamber and chamber not in CHAMBER_PREFIXES:
+        raise ValueError(f"chamber must be one of {', '.join(CHAMBER_PREFIXES)}.")
+    if bill_type and bill_type not in TYPE_PREFIXES:
+        raise ValueError(f"type must be one of {', '.join(TYPE_PREFIXES)}.")
+
+    if chamber or bill_type or search_term:
+        if not isinstance(bills, BillNumberIndex):
+            bills = BillNumberIndex(bills, key=MASTER_LIST_NUMBER_KEY)
+        bills = filter_bills(bills, chamber, bill_type, search_term)
+    elif isinstance(bills, BillNumberIndex):
+        bills = bills.bills
+    else:
+        bills = list(bills)
+
+    statuses = params.get("status")
+    if statuses:
+        try:
+            codes = {int(code) for code in statuses.split(",")}
+        except ValueError:
+            raise ValueError("status must be comma separated status codes.")
+        bills = [bill for bill in bills if bill.get("status") in codes]
+
+    from_date = params.get("from_date")
+    to_date = params.get("to_date")
+    if from_date or to_date:
+        try:
+            # ISO dates compare correctly as strings
+            from_date = date.fromisoformat(from_date).isoformat() if from_date else ""
+            to_date = date.fromisoformat(to_date).isoformat() if to_date else "9999"
+        except ValueError:
+            raise ValueError("from_date and to_date must be YYYY-MM-DD dates.")
+        bills = [
+            bill
+            for bill in bills
+            if from_date <= (bill.get("last_action_date") or "") <= to_date
+        ]
+
+    return bills
+
+
+def master_list_page(master_list: dict, params, version: Optional[str] = None) -> dict:
+    """
+    Filter and paginate a getMasterList payload.
+
+    Bills are filtered with filter_master_list, then paginated with the
+    page (default: 1) and page_size (default: 50, max: 200) parameters.
+    Bill number filters use the memoized index of the master list (see
+    master_list_index), so paging through a session indexes it once.
+    Pass the payload's master_list_version if already computed.
+    Raises ValueError for invalid parameters.
+
+    :return: {"session": {...}, "summary": {...}, "bills": [...]}
+    """
+    try:
+        page = max(int(params.get("page", 1)), 1)
+        page_size = min(max(int(params.get("page_size", 50)), 1), 200)
+    except ValueError:
+        raise ValueError("page and page_size must be integers.")
+
+    bills = filter_master_list(master_list_bills(master_list, params, version), params)
+    offset = (page - 1) * page_size
+
+    return {
+        "session": master_list.get("session"),
+        "summary": {"count": len(bills), "page": page, "page_size": page_size},
+        "bills": bills[offset : offset + page_size],
+    }
@@ -1,24 +1,302 @@
 """Legiscan related operations."""
 
+import copy
 import logging
+from contextvars import ContextVar
+import threading
+import time
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
 from django.conf import settings
 from enum import Enum
-from typing import Union, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import Callable, Iterable, Union, Any, Optional
 from typing_extensions import TypeAlias
 
+from .breaker import CircuitBreaker
+from .cache import LegiscanCache
+from .exceptions import CircuitOpen, LegiscanError, LegiscanUnavailable
+from .quota import LegiscanQuota
+
 logger = logging.getLogger(__name__)
 
 LegResponse: TypeAlias = Union[str, Union[dict, list[dict]]]
 
-BASE_URL = "https://api.legiscan.com/?key={key}&op="
-
-LEGISCAN_BILL_URL = BASE_URL + "getBill&id={bill_id}"
-LEGISCAN_TEXT_SEARCH_URL = BASE_URL + "getSearch&state={state}&query={query}"
-LEGISCAN_SESSION_TEXT_SEARCH_URL = (
-    BASE_URL + "getSearch&id={session_id}&query={query}&page={page}"
+BASE_URL = "https://api.legiscan.com/"
+
+OP_GET_BILL = "getBill"
+OP_SEARCH = "getSearch"
+OP_SESSION_LIST = "getSessionList"
+OP_SESSION_PEOPLE = "getSessionPeople"
+OP_MASTER_LIST = "getMasterList"
+OP_MASTER_LIST_RAW = "getMasterListRaw"
+OP_DATASET_LIST = "getDatasetList"
+OP_DATASET = "getDataset"
+OP_SPONSORED_LIST = "getSponsoredList"
+OPS = (
+    OP_GET_BILL,
+    OP_SEARCH,
+    OP_SESSION_LIST,
+    OP_SESSION_PEOPLE,
+    OP_MASTER_LIST,
+    OP_MASTER_LIST_RAW,
+    OP_DATASET_LIST,
+    OP_DATASET,
+    OP_SPONSORED_LIST,
 )
-LEGISCAN_SESSION_LIST_URL = BASE_URL + "getSessionList&state={state}"
+
+# Set when a stale payload was served, see middleware.LegiscanStaleMiddleware
+served_stale: ContextVar[bool] = ContextVar("served_stale", default=False)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls within a process.
+
+    The first caller for a key makes the call; callers arriving while it
+    is in flight wait for it and share its result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> (future, number of waiting callers)
+        self._calls: dict[str, list] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """Run func once for all concurrent callers with the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call:
+                call[1] += 1
+            else:
+                future = Future()
+                self._calls[key] = [future, 0]
+
+        if call:
+            # Each caller gets its own copy, see process_bill_data
+            return copy.deepcopy(call[0].result())
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            _, waiters = self._calls.pop(key)
+        future.set_result(copy.deepcopy(result) if waiters else result)
+        return result
+
+
+class LegiscanClient:
+    """
+    Legiscan API client.
+
+    Holds a pooled, keep-alive `requests.Session` so that calls to
+    api.legiscan.com reuse TCP/TLS connections instead of opening a new
+    one per request.
+
+    Concurrent identical cached calls are coalesced into one request, in
+    process by SingleFlight and across processes by a short cache lock
+    held for up to `coalesce_wait` seconds.
+
+    Requests go through a CircuitBreaker; while Legiscan is down cached
+    calls serve the last-known-good payload instead of failing.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = BASE_URL,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 15,
+        cache: Optional[LegiscanCache] = None,
+        quota: Optional[LegiscanQuota] = None,
+        coalesce_wait: float = 0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.quota = quota
+        self.coalesce_wait = coalesce_wait
+        self.breaker = breaker
+        self.flights = SingleFlight()
+
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_settings(cls) -> "LegiscanClient":
+        """Build a client configured from django settings."""
+        return cls(
+            api_key=settings.LEGISCAN_API_KEY,
+            base_url=settings.LEGISCAN_BASE_URL,
+            pool_size=settings.LEGISCAN_POOL_SIZE,
+            connect_timeout=settings.LEGISCAN_CONNECT_TIMEOUT,
+            read_timeout=settings.LEGISCAN_READ_TIMEOUT,
+            cache=LegiscanCache.from_settings(),
+            quota=LegiscanQuota.from_settings(),
+            coalesce_wait=settings.LEGISCAN_COALESCE_WAIT,
+            breaker=CircuitBreaker.from_settings(),
+        )
+
+    def call(self, op: str, **params) -> dict:
+        """
+        Call a Legiscan operation and return the decoded payload.
+
+        Raises LegiscanError on network errors, non-200 responses and
+        Legiscan "ERROR" statuses, and LegiscanUnavailable without making
+        the request when the circuit is open or the quota or rate limit
+        is reached.
+        """
+        if self.breaker and not self.breaker.allow():
+            raise CircuitOpen(f"{op} refused: Legiscan is unavailable")
+
+        return self._request(op, **params)
+
+    def _request(self, op: str, **params) -> dict:
+        query = {"key": self.api_key, "op": op, **params}
+
+        self.before_request(op)
+        try:
+            response = self.session.get(
+                self.base_url, params=query, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            self.after_request(op, failed=True)
+            raise LegiscanError(f"{op} request failed: {e}") from e
+
+        self.after_request(op, failed=response.status_code >= 500)
+        return self.parse_response(op, response.status_code, response.json)
+
+    def before_request(self, op: str) -> None:
+        """Take a quota token for a request, see LegiscanQuota.acquire."""
+        if self.quota:
+            self.quota.acquire(op)
+
+    def after_request(self, op: str, failed: bool) -> None:
+        """Account for a request made, and whether Legiscan failed it."""
+        if self.quota:
+            self.quota.record(op)
+
+        if self.breaker:
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    @staticmethod
+    def parse_response(op: str, status_code: int, json: Callable[[], dict]) -> dict:
+        """Decode a Legiscan response, raising LegiscanError on errors."""
+        if status_code != 200:
+            raise LegiscanError(f"{op} failed: status_code {status_code}")
+
+        payload = json()
+        if payload.get("status") == "ERROR":
+            alert = payload.get("alert", {}).get("message", "unknown error")
+            raise LegiscanError(f"{op} failed: {alert}")
+
+        return payload
+
+    def cached_call(
+        self,
+        op: str,
+        change_hash: Optional[str] = None,
+        allow_stale: bool = True,
+        **params,
+    ):
+        """
+        Call a Legiscan operation through the response cache.
+
+        When change_hash is given it becomes part of the cache key and the
+        entry is kept for the (longer) hash TTL, since a payload for a
+        given change_hash never changes.
+
+        Misses are coalesced: concurrent callers share a single request.
+        When the request fails the last-known-good payload is returned
+        instead, if there is one and allow_stale is set, see stale.
+        """
+        if self.cache is None:
+            return self.call(op, **params)
+
+        key_params = dict(params, change_hash=change_hash) if change_hash else params
+        payload = self.cache.get(op, key_params)
+
+        if payload is None:
+            try:
+                payload = self.flights.do(
+                    self.cache.key(op, key_params),
+                    lambda: self._fetch_shared(op, key_params, change_hash, params),
+                )
+            except LegiscanError as e:
+                payload = self.stale(op, key_params, e) if allow_stale else None
+                if payload is None:
+                    raise
+
+        return payload
+
+    def stale(self, op: str, key_params: dict, error: Exception) -> Optional[dict]:
+        """
+        The last-known-good payload for a call that failed with error.
+
+        Sets served_stale when there is one; returns None otherwise.
+        """
+        payload = self.cache.stale(op, key_params) if self.cache else None
+        if payload is not None:
+            logger.warning("Serving stale %s payload: %s", op, error)
+            served_stale.set(True)
+        return payload
+
+    def _fetch_shared(
+        self, op: str, key_params: dict, change_hash: Optional[str], params: dict
+    ) -> dict:
+        """Fetch and cache a payload, or wait for another process to."""
+        locked = self.coalesce_wait and self.cache.is_cached(op)
+
+        if locked and not self.cache.lock(op, key_params, self.coalesce_wait):
+            deadline = time.monotonic() + self.coalesce_wait
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                payload = self.cache.peek(op, key_params)
+                if payload is not None:
+                    return payload
+            # The other process failed or is too slow, fetch it ourselves
+            locked = False
+
+        try:
+            payload = self.call(op, **params)
+            ttl = self.cache.hash_ttl if change_hash else None
+            self.cache.set(op, key_params, payload, ttl=ttl)
+        finally:
+            if locked:
+                self.cache.unlock(op, key_params)
+
+        return payload
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+
+_client: Optional[LegiscanClient] = None
+
+
+def get_client() -> LegiscanClient:
+    """Return the shared, process-wide Legiscan client."""
+    global _client
+
+    if _client is None:
+        _client = LegiscanClient.from_settings()
+
+    return _client
 
 
 class LegiscanStatus(Enum):
@@ -71,29 +349,46 @@ class LegiscanStatus(Enum):
             return "Unknown Status"
 
 
-def fetch_bill(legiscan_bill_id) -> LegResponse:
-    """Fetch bill data from Legiscan."""
-    url = LEGISCAN_BILL_URL.format(
-        key=settings.LEGISCAN_API_KEY,
-        bill_id=legiscan_bill_id,
-    )
-    response = requests.get(url)
+def process_bill_data(obj: dict) -> dict:
+    """
+    Process bill data.
+
+    - replace status code with text
+    """
+    if "status" in obj:
+        obj["status"] = LegiscanStatus.code_to_text(obj["status"])
 
-    if response.status_code != 200:
-        return f"bill fetch failed: status_code {response.status_code}"
+    return obj
 
-    def process_bill_data(obj: dict) -> dict:
-        """
-        Process bill data.
 
-        - replace status code with text
-        """
-        if "status" in obj:
-            obj["status"] = LegiscanStatus.code_to_text(obj["status"])
+def _fetch(description: str, op: str, **params) -> Union[dict, str]:
+    """
+    Call Legiscan through the cache, returning an error string on failure.
+
+    LegiscanUnavailable is re-raised so that callers fail fast, see
+    exceptions.legiscan_exception_handler.
+    """
+    try:
+        return get_client().cached_call(op, **params)
+    except LegiscanUnavailable:
+        raise
+    except LegiscanError as e:
+        logger.error("Failed to fetch %s: %s", description, e)
+        return f"{description} fetch failed: {e}"
 
-        return obj
 
-    bill = response.json().get("bill")
+def fetch_bill(legiscan_bill_id, change_hash: Optional[str] = None) -> LegResponse:
+    """
+    Fetch bill data from Legiscan.
+
+    Pass the bill's known change_hash to serve it from cache for as long
+    as the bill is unchanged.
+    """
+    payload = _fetch("bill", OP_GET_BILL, change_hash=change_hash, id=legiscan_bill_id)
+    if isinstance(payload, str):
+        return payload
+
+    bill = payload.get("bill")
     bill = process_bill_data(bill)
 
     return bill
@@ -106,22 +401,93 @@ def text_search_state(query) -> LegResponse:
     :param query: The search term (e.g., keyword or phrase).
     :return: List of matching bills.
     """
-    url = LEGISCAN_TEXT_SEARCH_URL.format(
-        key=settings.LEGISCAN_API_KEY,
-        state=settings.LEGISCAN_STATE,
-        query=query,
+    payload = _fetch(
+        "text search", OP_SEARCH, state=settings.LEGISCAN_STATE, query=query
     )
-    response = requests.get(url)
+    if isinstance(payload, str):
+        return payload
 
-    if response.status_code != 200:
-        return f"text search failed: status_code {response.status_code}"
-
-    return list(response.json().get("searchresult", {}).values())
+    return list(payload.get("searchresult", {}).values())
 
 
 def text_search_state_no_summary(query: str) -> Any:
     """Run text search without summary."""
-    return text_search_state(query)[1:]  # Skip summary
+    results = text_search_state(query)
+
+    if isinstance(results, str):
+        return []
+    return results[1:]  # Skip summary
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls to at most `rate` per second.
+
+    Shared by all worker threads of a fan-out so that raising the
+    concurrency does not raise the request rate.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        """Block until the caller may make a request."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+_search_limiter: Optional[RateLimiter] = None
+
+
+def get_search_limiter() -> RateLimiter:
+    """Return the process-wide limiter for search fan-outs."""
+    global _search_limiter
+
+    if _search_limiter is None:
+        _search_limiter = RateLimiter(settings.LEGISCAN_SEARCH_RATE)
+
+    return _search_limiter
+
+
+def search_many(
+    queries: Iterable[str],
+    search_func: Callable[[str], list] = text_search_state_no_summary,
+    max_workers: Optional[int] = None,
+) -> dict[str, list]:
+    """
+    Run many searches concurrently.
+
+    At most `max_workers` (LEGISCAN_SEARCH_CONCURRENCY by default) searches
+    are in flight at once, and all of them share the search rate limiter.
+    Queries refused for the quota or rate limit get no results rather than
+    failing the other searches.
+
+    :return: {query: results}
+    """
+    queries = list(dict.fromkeys(queries))
+    if not queries:
+        return {}
+
+    limiter = get_search_limiter()
+
+    def limited_search(query):
+        limiter.acquire()
+        try:
+            return search_func(query)
+        except LegiscanUnavailable as e:
+            logger.warning("Skipping search for %r: %s", query, e)
+            return []
+
+    workers = min(max_workers or settings.LEGISCAN_SEARCH_CONCURRENCY, len(queries))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(queries, pool.map(limited_search, queries)))
 
 
 def text_search_session(session_id, query, page) -> LegResponse:
@@ -131,39 +497,55 @@ def text_search_session(session_id, query, page) -> LegResponse:
     :param query: The search term (e.g., keyword or phrase).
     :return: List of matching bills.
     """
-    url = LEGISCAN_SESSION_TEXT_SEARCH_URL.format(
-        key=settings.LEGISCAN_API_KEY,
-        session_id=session_id,
-        query=query,
-        page=page,
-    )
-    response = requests.get(url)
+    payload = _fetch("text search", OP_SEARCH, id=session_id, query=query, page=page)
+    if isinstance(payload, str):
+        return payload
+
+    return payload.get("searchresult", {})
+
 
-    if response.status_code != 200:
-        return f"text search failed: status_code {response.status_code}"
+def fetch_session_list() -> LegResponse:
+    """Fetch the list of legislative sessions for the configured state."""
+    payload = _fetch("session list", OP_SESSION_LIST, state=settings.LEGISCAN_STATE)
+    if isinstance(payload, str):
+        return payload
 
-    return response.json().get("searchresult", {})
+    return payload.get("sessions", [])
+
+
+def fetch_session_people(session_id) -> LegResponse:
+    """Fetch the people active in a session."""
+    payload = _fetch("session people", OP_SESSION_PEOPLE, id=session_id)
+    if isinstance(payload, str):
+        return payload
+
+    return payload.get("sessionpeople", [])
+
+
+def fetch_master_list(session_id) -> LegResponse:
+    """Fetch the master list of bills for a session."""
+    payload = _fetch("master list", OP_MASTER_LIST, id=session_id)
+    if isinstance(payload, str):
+        return payload
+
+    return payload.get("masterlist", {})
+
+
+def fetch_sponsored_list(people_id) -> LegResponse:
+    """Fetch bills sponsored by a person."""
+    payload = _fetch("sponsored list", OP_SPONSORED_LIST, id=people_id)
+    if isinstance(payload, str):
+        return payload
+
+    return payload.get("sponsoredbills", {})
 
 
 def fetch_latest_session_id() -> Optional[str]:
     """Fetch the most recent session ID from LegiScan."""
     logger.info("Fetching session list from legiscan")
-    url = LEGISCAN_SESSION_LIST_URL.format(
-        key=settings.LEGISCAN_API_KEY,
-        state=settings.LEGISCAN_STATE,
-    )
-
-    response = requests.get(url)
-
-    if response.status_code != 200:
-        logger.error(
-            "Failed to fetch sessions: status code %s",
-            response.status_code,
-        )
-    else:
-        sessions = response.json().get("sessions", [])
+    sessions = fetch_session_list()
 
-        if sessions:
-            return str(sessions[0]["session_id"])
+    if sessions and not isinstance(sessions, str):
+        return str(sessions[0]["session_id"])
 
     return None
@@ -0,0 +1,71 @@
+"""Keyword matching for the daily digest."""
+
+import re
+from collections import defaultdict
+from typing import Any, Hashable, Iterable
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class KeywordIndex:
+    """
+    Inverted index over monitored keywords.
+
+    Each keyword is indexed under its first token. Matching a document
+    scans its distinct tokens once and only verifies the keywords indexed
+    under those tokens, so the cost grows with the document size rather
+    than with the number of keywords or subscribers.
+
+    A keyword matches when all of its tokens occur in the document as
+    whole words, like the local full-text search on SQLite. On Postgres
+    the search uses the 'english' text search configuration, which stems
+    words and ignores stopwords, so it can find bills the digest does not
+    (e.g. "schools" for the keyword "school").
+    """
+
+    def __init__(self):
+        # first token -> {keyword tokens -> subscribers}
+        self._index: dict[str, dict[frozenset, set]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+
+    def __len__(self) -> int:
+        return sum(len(keywords) for keywords in self._index.values())
+
+    def add(self, keyword: str, subscriber: Hashable) -> None:
+        """Register a subscriber's interest in a keyword."""
+        tokens = tokenize(keyword)
+        if tokens:
+            self._index[tokens[0]][frozenset(tokens)].add(subscriber)
+
+    def match(self, text: str) -> set:
+        """Return the subscribers of every keyword found in text."""
+        tokens = set(tokenize(text))
+        matches: set = set()
+
+        for token in tokens:
+            for keyword_tokens, subscribers in self._index.get(token, {}).items():
+                if keyword_tokens <= tokens:
+                    matches |= subscribers
+
+        return matches
+
+    def match_all(self, documents: Iterable[tuple[Any, str]]) -> dict[Hashable, list]:
+        """
+        Match many documents in a single pass.
+
+        :param documents: (document, text) pairs.
+        :return: {subscriber: [matching documents]}
+        """
+        results: dict = defaultdict(list)
+
+        for document, text in documents:
+            for subscriber in self.match(text):
+                results[subscriber].append(document)
+
+        return results
@@ -0,0 +1,41 @@
+"""Bill middleware."""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .legiscan import served_stale
+
+STALE_HEADER = "X-Legiscan-Stale"
+
+
+class LegiscanStaleMiddleware:
+    """Flag responses built from stale Legiscan payloads with a header."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = served_stale.set(False)
+        try:
+            return self.flag(self.get_response(request))
+        finally:
+            served_stale.reset(token)
+
+    async def __acall__(self, request):
+        token = served_stale.set(False)
+        try:
+            return self.flag(await self.get_response(request))
+        finally:
+            served_stale.reset(token)
+
+    def flag(self, response):
+        if served_stale.get():
+            response[STALE_HEADER] = "true"
+        return response
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.19 on 2026-10-17 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bill", "0013_appsettings_userbillinteraction_is_archived"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bill",
+            name="change_hash",
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="description",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="last_action",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="last_action_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="legiscan_data",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="session_id",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="state_link",
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="status",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="status_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="synced_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="bill",
+            name="url",
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["session_id"], name="bill_bill_session_f9eb9e_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+
+class VendorRunSQL(migrations.RunSQL):
+    """RunSQL that only runs on one database backend."""
+
+    def __init__(self, vendor, *args, **kwargs):
+        self.vendor = vendor
+        super().__init__(*args, **kwargs)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+# bill.search queries this expression, it must stay in sync with PG_VECTOR
+POSTGRESQL_INDEX = (
+    "CREATE INDEX IF NOT EXISTS bill_bill_search_idx ON bill_bill USING GIN ("
+    "to_tsvector('english', coalesce(bill_number, '') || ' ' || "
+    "coalesce(bill_title, '') || ' ' || coalesce(description, '')))"
+)
+
+SQLITE_INSERT_NEW = (
+    "INSERT INTO bill_bill_fts(rowid, bill_number, bill_title, description) "
+    "VALUES (new.id, new.bill_number, new.bill_title, new.description);"
+)
+SQLITE_DELETE_OLD = (
+    "INSERT INTO bill_bill_fts(bill_bill_fts, rowid, bill_number, bill_title, "
+    "description) VALUES ('delete', old.id, old.bill_number, old.bill_title, "
+    "old.description);"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bill", "0014_bill_legiscan_mirror"),
+    ]
+
+    operations = [
+        VendorRunSQL(
+            "postgresql",
+            POSTGRESQL_INDEX,
+            "DROP INDEX IF EXISTS bill_bill_search_idx",
+        ),
+        VendorRunSQL(
+            "sqlite",
+            [
+                "CREATE VIRTUAL TABLE IF NOT EXISTS bill_bill_fts USING fts5("
+                "bill_number, bill_title, description, "
+                "content='bill_bill', content_rowid='id')",
+                "CREATE TRIGGER IF NOT EXISTS bill_bill_fts_ai "
+                f"AFTER INSERT ON bill_bill BEGIN {SQLITE_INSERT_NEW} END",
+                "CREATE TRIGGER IF NOT EXISTS bill_bill_fts_ad "
+                f"AFTER DELETE ON bill_bill BEGIN {SQLITE_DELETE_OLD} END",
+                "CREATE TRIGGER IF NOT EXISTS bill_bill_fts_au "
+                "AFTER UPDATE ON bill_bill "
+                f"BEGIN {SQLITE_DELETE_OLD} {SQLITE_INSERT_NEW} END",
+                "INSERT INTO bill_bill_fts(bill_bill_fts) VALUES ('rebuild')",
+            ],
+            [
+                "DROP TRIGGER IF EXISTS bill_bill_fts_ai",
+                "DROP TRIGGER IF EXISTS bill_bill_fts_ad",
+                "DROP TRIGGER IF EXISTS bill_bill_fts_au",
+                "DROP TABLE IF EXISTS bill_bill_fts",
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.19 on 2026-10-17 16:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("bill", "0015_bill_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appsettings",
+            name="last_digest_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="DigestDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("legiscan_bill_id", models.CharField(max_length=100)),
+                ("change_hash", models.CharField(blank=True, max_length=32, null=True)),
+                ("delivered_at", models.DateTimeField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="digest_deliveries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Digest Deliveries",
+                "unique_together": {("user", "legiscan_bill_id")},
+            },
+        ),
+    ]
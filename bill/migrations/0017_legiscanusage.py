@@ -0,0 +1,35 @@
+# Generated by Django 4.2.19 on 2026-10-17 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bill", "0016_digestdelivery_appsettings_last_digest_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LegiscanUsage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("op", models.CharField(max_length=50)),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "Legiscan Usage",
+                "ordering": ["-date", "op"],
+                "unique_together": {("date", "op")},
+            },
+        ),
+    ]
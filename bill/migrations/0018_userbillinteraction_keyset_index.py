@@ -0,0 +1,22 @@
+# Generated by Django 4.2.19 on 2026-10-17 17:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("bill", "0017_legiscanusage"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userbillinteraction",
+            index=models.Index(
+                fields=["user", "-modified", "-id"],
+                name="bill_interaction_keyset_idx",
+            ),
+        ),
+    ]
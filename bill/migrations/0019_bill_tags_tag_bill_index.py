@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the bill-tag through table by (tag_id, bill_id).
+
+    The foreign key index on tag_id already finds a tag's rows, but tag
+    searches then read every row for its bill_id. This covering index
+    holds both columns, so the grouped match count in search_by_tags is
+    answered from the index alone.
+    """
+
+    dependencies = [
+        ("bill", "0018_userbillinteraction_keyset_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS bill_bill_tags_tag_bill_idx "
+            "ON bill_bill_tags (tag_id, bill_id)",
+            "DROP INDEX IF EXISTS bill_bill_tags_tag_bill_idx",
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.19 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bill", "0019_bill_tags_tag_bill_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appsettings",
+            name="mirror_session_id",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="appsettings",
+            name="mirror_synced_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
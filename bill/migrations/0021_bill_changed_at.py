@@ -0,0 +1,27 @@
+# Generated by Django 4.2.19 on 2026-10-17 17:54
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def forward_copy_synced_at(apps, schema_editor):
+    """Start changed_at from synced_at, the only change time recorded so far."""
+
+    Bill = apps.get_model("bill", "Bill")
+    Bill.objects.update(changed_at=F("synced_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bill", "0020_appsettings_mirror_synced"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bill",
+            name="changed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(forward_copy_synced_at, migrations.RunPython.noop),
+    ]
@@ -22,6 +22,10 @@ class AppSettings(models.Model):
     """Stores application state."""
 
     current_session_id = models.CharField(max_length=255, null=True, blank=True)
+    last_digest_at = models.DateTimeField(null=True, blank=True)
+    # Session and time of the last completed sync_session_bills run
+    mirror_session_id = models.CharField(max_length=255, null=True, blank=True)
+    mirror_synced_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Current Session ID: {self.current_session_id}"
@@ -60,6 +64,27 @@ class Bill(models.Model):
     admin_note = models.TextField(null=True, blank=True)
     admin_expanded_analysis_url = models.URLField(null=True, blank=True)
 
+    # Legiscan mirror, kept up to date by services.sync_session_bills
+    session_id = models.CharField(max_length=100, null=True, blank=True)
+    change_hash = models.CharField(max_length=32, null=True, blank=True)
+    description = models.TextField(null=True, blank=True)
+    status = models.PositiveSmallIntegerField(null=True, blank=True)
+    status_date = models.DateField(null=True, blank=True)
+    last_action = models.TextField(null=True, blank=True)
+    last_action_date = models.DateField(null=True, blank=True)
+    url = models.URLField(max_length=500, null=True, blank=True)
+    state_link = models.URLField(max_length=500, null=True, blank=True)
+    legiscan_data = models.JSONField(null=True, blank=True)
+    # Last time Legiscan confirmed the mirrored data current
+    synced_at = models.DateTimeField(null=True, blank=True)
+    # Last time the change_hash changed, see tasks.changed_bills
+    changed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["session_id"]),
+        ]
+
     def __str__(self):
         """Represent Bill as str."""
         return f"Bill: {self.bill_number}"
@@ -109,6 +134,13 @@ class UserBillInteraction(TimeStampedModel):
     class Meta:
         unique_together = ("user", "bill")
         ordering = ["modified"]
+        indexes = [
+            # Keyset pagination of a user's interactions, see pagination.py
+            models.Index(
+                fields=["user", "-modified", "-id"],
+                name="bill_interaction_keyset_idx",
+            ),
+        ]
 
     def __str__(self):
         """Represent UserBillInteraction as str."""
@@ -150,3 +182,44 @@ class UserKeyword(TimeStampedModel):
     def __str__(self):
         """Represent UserKeyword as str."""
         return f"Keyword: '{self.keyword}' for {self.user}"
+
+
+class DigestDelivery(models.Model):
+    """
+    Records the version of a bill last sent to a user in a digest.
+
+    A bill is only included in a user's next digest once its change_hash
+    differs from the delivered one.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="digest_deliveries"
+    )
+    legiscan_bill_id = models.CharField(max_length=100)
+    change_hash = models.CharField(max_length=32, null=True, blank=True)
+    delivered_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "legiscan_bill_id")
+        verbose_name_plural = "Digest Deliveries"
+
+    def __str__(self):
+        """Represent DigestDelivery as str."""
+        return f"DigestDelivery: Bill {self.legiscan_bill_id} to {self.user_id}"
+
+
+class LegiscanUsage(models.Model):
+    """Counts Legiscan requests per day and operation."""
+
+    date = models.DateField()
+    op = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("date", "op")
+        ordering = ["-date", "op"]
+        verbose_name_plural = "Legiscan Usage"
+
+    def __str__(self):
+        """Represent LegiscanUsage as str."""
+        return f"LegiscanUsage: {self.op} on {self.date}: {self.count}"
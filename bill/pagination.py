@@ -0,0 +1,66 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are fetched with `WHERE (modified, id) < (cursor)` instead of an
+OFFSET, so every page costs the same however deep the client pages.
+"""
+
+import base64
+import binascii
+from typing import Optional
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+KEYSET_ORDERING = ("-modified", "-id")
+
+
+def encode_cursor(obj) -> str:
+    """Cursor pointing just past obj."""
+    position = f"{obj.modified.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decode a cursor into (modified, id).
+
+    Raises ValueError for a malformed cursor.
+    """
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode()).decode()
+        modified, pk = position.split("|")
+        modified = parse_datetime(modified)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    if modified is None:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    return modified, pk
+
+
+def keyset_page(
+    queryset: QuerySet, cursor: Optional[str], page_size: int
+) -> tuple[list, Optional[str]]:
+    """
+    Return a page of queryset, newest first, and the cursor of the next one.
+
+    The next cursor is None on the last page. Raises ValueError for a
+    malformed cursor.
+    """
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+
+    if cursor:
+        modified, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(modified__lt=modified) | Q(modified=modified, id__lt=pk)
+        )
+
+    # One extra row tells whether there is a next page
+    rows = list(queryset[: page_size + 1])
+    page = rows[:page_size]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > page_size else None
+
+    return page, next_cursor
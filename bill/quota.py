@@ -0,0 +1,165 @@
+"""Legiscan rate limiting and quota accounting."""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .exceptions import QuotaExhausted, RateLimited
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "legiscan:quota"
+# Seconds to keep the monthly total and request counts not yet flushed
+MONTH_TIMEOUT = 60 * 60 * 24 * 32
+PENDING_TIMEOUT = 60 * 60 * 24 * 7
+
+
+class LegiscanQuota:
+    """
+    Process-safe throttle and usage accounting for Legiscan.
+
+    Requests are throttled with a per-second allowance of `rate_limit`
+    tokens counted in the shared cache, so all workers draw from the same
+    bucket. Requests are counted per day and operation in the cache, next
+    to the running monthly total, so neither the quota check nor a
+    request touches the database; flush() moves the counts to
+    LegiscanUsage. Counts not flushed yet are missed if the monthly total
+    has to be reseeded from the database.
+    """
+
+    def __init__(
+        self,
+        alias: str,
+        monthly_quota: int,
+        rate_limit: int,
+        max_wait: float = 2,
+    ):
+        self.alias = alias
+        self.monthly_quota = monthly_quota
+        self.rate_limit = rate_limit
+        self.max_wait = max_wait
+
+    @classmethod
+    def from_settings(cls) -> "LegiscanQuota":
+        """Build a quota configured from django settings."""
+        return cls(
+            alias=settings.LEGISCAN_CACHE_ALIAS,
+            monthly_quota=settings.LEGISCAN_MONTHLY_QUOTA,
+            rate_limit=settings.LEGISCAN_RATE_LIMIT,
+            max_wait=settings.LEGISCAN_RATE_MAX_WAIT,
+        )
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _month_key(self, today=None) -> str:
+        today = today or timezone.now().date()
+        return f"{KEY_PREFIX}:month:{today:%Y-%m}"
+
+    def month_count(self) -> int:
+        """Requests made this month."""
+        key = self._month_key()
+        count = self.backend.get(key)
+
+        if count is None:
+            from .models import LegiscanUsage
+
+            today = timezone.now().date()
+            count = (
+                LegiscanUsage.objects.filter(
+                    date__year=today.year, date__month=today.month
+                ).aggregate(total=Sum("count"))["total"]
+                or 0
+            )
+            self.backend.add(key, count, timeout=MONTH_TIMEOUT)
+
+        return count
+
+    def acquire(self, op: str) -> None:
+        """
+        Take a token for a request, waiting up to max_wait for one.
+
+        Raises QuotaExhausted or RateLimited instead of blocking longer.
+        """
+        if self.monthly_quota and self.month_count() >= self.monthly_quota:
+            raise QuotaExhausted(
+                f"{op} refused: monthly quota of {self.monthly_quota} used up"
+            )
+
+        if not self.rate_limit:
+            return
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            now = time.time()
+            window = f"{KEY_PREFIX}:rate:{int(now)}"
+            if self._incr(window, timeout=2) <= self.rate_limit:
+                return
+
+            wait = 1 - (now % 1)
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(f"{op} refused: rate limit reached")
+            time.sleep(wait)
+
+    def _pending_key(self, op: str, day) -> str:
+        return f"{KEY_PREFIX}:pending:{day:%Y-%m-%d}:{op}"
+
+    def record(self, op: str) -> None:
+        """Count a request made to Legiscan, see flush."""
+        # Make sure the monthly counter is seeded before incrementing it
+        self.month_count()
+        self._incr(self._month_key(), timeout=MONTH_TIMEOUT)
+        self._incr(
+            self._pending_key(op, timezone.now().date()), timeout=PENDING_TIMEOUT
+        )
+
+    def flush(self, ops: Iterable[str], days: int = 2) -> int:
+        """
+        Add the request counts of the last `days` days to LegiscanUsage.
+
+        Returns the number of requests written.
+        """
+        from .models import LegiscanUsage
+
+        today = timezone.now().date()
+        written = 0
+
+        for day in (today - timedelta(days=n) for n in range(days)):
+            for op in ops:
+                key = self._pending_key(op, day)
+                count = self.backend.get(key)
+                if not count:
+                    continue
+                try:
+                    # Requests counted meanwhile are left for the next flush
+                    self.backend.decr(key, count)
+                except ValueError:
+                    pass
+
+                usage = LegiscanUsage.objects.filter(date=day, op=op)
+                if not usage.update(count=F("count") + count):
+                    try:
+                        LegiscanUsage.objects.create(date=day, op=op, count=count)
+                    except IntegrityError:
+                        usage.update(count=F("count") + count)
+                written += count
+
+        return written
+
+    def _incr(self, key: str, timeout: Optional[int]) -> int:
+        if self.backend.add(key, 1, timeout=timeout):
+            return 1
+        try:
+            return self.backend.incr(key)
+        except ValueError:
+            # Expired between add and incr
+            self.backend.add(key, 1, timeout=timeout)
+            return 1
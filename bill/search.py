@@ -0,0 +1,128 @@
+"""
+Local full-text search over mirrored bills.
+
+Postgres uses a GIN-indexed tsvector expression, SQLite an FTS5 table kept
+in sync by triggers. Both are created by migration 0015; other backends
+fall back to a (slow) icontains scan.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Bill
+
+SEARCH_CONFIG = "english"
+FTS_TABLE = "bill_bill_fts"
+SEARCH_COLUMNS = ("bill_number", "bill_title", "description")
+
+# Must match the index expression of migration 0015 exactly for Postgres
+# to use the index.
+PG_DOCUMENT = " || ' ' || ".join(f"coalesce({c}, '')" for c in SEARCH_COLUMNS)
+PG_VECTOR = f"to_tsvector('{SEARCH_CONFIG}', {PG_DOCUMENT})"
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def search_bills(
+    query: str, page: int = 1, page_size: int = 50
+) -> tuple[int, list[Bill]]:
+    """
+    Search mirrored bills by number, title and description.
+
+    All terms in the query must match. Results are ordered by relevance
+    and each bill carries a `rank` attribute (higher is better).
+
+    :return: (total number of matches, bills on the requested page)
+    """
+    terms = [term.lower() for term in TOKEN_RE.findall(query)]
+    if not terms:
+        return 0, []
+
+    offset = (max(page, 1) - 1) * page_size
+    vendor = connection.vendor
+
+    if vendor == "postgresql":
+        return _search_postgresql(" ".join(terms), page_size, offset)
+    if vendor == "sqlite":
+        return _search_sqlite(terms, page_size, offset)
+    return _search_fallback(terms, page_size, offset)
+
+
+def _search_postgresql(query: str, limit: int, offset: int):
+    from_clause = (
+        f"FROM bill_bill, plainto_tsquery('{SEARCH_CONFIG}', %s) query "
+        f"WHERE {PG_VECTOR} @@ query"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) {from_clause}", [query])
+        total = cursor.fetchone()[0]
+
+    bills = Bill.objects.raw(
+        f"SELECT bill_bill.*, ts_rank({PG_VECTOR}, query) AS rank {from_clause} "
+        "ORDER BY rank DESC, bill_bill.id LIMIT %s OFFSET %s",
+        [query, limit, offset],
+    )
+    return total, list(bills)
+
+
+def _search_sqlite(terms: list[str], limit: int, offset: int):
+    # Quote each term so user input is never parsed as FTS5 syntax.
+    match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+    from_clause = (
+        f"FROM {FTS_TABLE} JOIN bill_bill ON bill_bill.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) {from_clause}", [match])
+        total = cursor.fetchone()[0]
+
+    bills = Bill.objects.raw(
+        f"SELECT bill_bill.*, -bm25({FTS_TABLE}) AS rank {from_clause} "
+        "ORDER BY rank DESC, bill_bill.id LIMIT %s OFFSET %s",
+        [match, limit, offset],
+    )
+    return total, list(bills)
+
+
+def _search_fallback(terms: list[str], limit: int, offset: int):
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(bill_number__icontains=term)
+            | Q(bill_title__icontains=term)
+            | Q(description__icontains=term)
+        )
+
+    bills = Bill.objects.filter(condition).order_by("id")
+    page = list(bills[offset : offset + limit])
+    for bill in page:
+        bill.rank = 0.0
+    return bills.count(), page
+
+
+def search_result(bill: Bill) -> dict:
+    """Represent a bill like a Legiscan getSearch result."""
+    return {
+        "relevance": round(getattr(bill, "rank", 0.0), 4),
+        "state": settings.LEGISCAN_STATE,
+        "bill_number": bill.bill_number,
+        "bill_id": int(bill.legiscan_bill_id),
+        "change_hash": bill.change_hash,
+        "url": bill.url,
+        "last_action_date": (
+            bill.last_action_date.isoformat() if bill.last_action_date else None
+        ),
+        "last_action": bill.last_action,
+        "title": bill.bill_title,
+    }
+
+
+def text_search_local(
+    query: str, page: int = 1, page_size: int = 50
+) -> tuple[int, list[dict]]:
+    """Search mirrored bills and return Legiscan-style results."""
+    total, bills = search_bills(query, page=page, page_size=page_size)
+    return total, [search_result(bill) for bill in bills]
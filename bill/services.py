@@ -1,10 +1,44 @@
 """Bill services."""
 
 import logging
-from .models import AppSettings, UserBillInteraction
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django_q.tasks import async_task
+
+from .legiscan import (
+    OP_GET_BILL,
+    OP_MASTER_LIST_RAW,
+    LegiscanError,
+    LegiscanUnavailable,
+    get_client,
+)
+from .models import AppSettings, Bill, DigestDelivery, UserBillInteraction
 
 logger = logging.getLogger(__name__)
 
+# Bill fields owned by the Legiscan mirror; admin fields are never touched.
+MIRROR_FIELDS = [
+    "bill_number",
+    "bill_title",
+    "session_id",
+    "change_hash",
+    "description",
+    "status",
+    "status_date",
+    "last_action",
+    "last_action_date",
+    "url",
+    "state_link",
+    "legiscan_data",
+    "synced_at",
+    "changed_at",
+]
+
 
 def archive_all_active_interactions() -> int:
     """Archives all non-archived user bill interactions."""
@@ -41,3 +75,270 @@ def transition_session(latest_session_id: str) -> bool:
         return True
 
     return False
+
+
+def mirror_is_synced() -> bool:
+    """
+    Whether the local mirror holds the current session.
+
+    Only a completed sync_session_bills run for the current session
+    counts; bills mirrored one at a time (e.g. by refresh_bill) do not.
+    """
+    app_settings = AppSettings.objects.filter(id=1).first()
+    return bool(
+        app_settings
+        and app_settings.current_session_id
+        and app_settings.mirror_synced_at
+        and app_settings.mirror_session_id == app_settings.current_session_id
+    )
+
+
+def _parse_date(value: Optional[str]):
+    """Parse a Legiscan date, which uses "0000-00-00" for missing dates."""
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def bill_from_legiscan(bill_data: dict) -> Bill:
+    """Build an unsaved Bill mirroring a getBill payload."""
+    history = bill_data.get("history") or []
+    last_event = history[-1] if history else {}
+    now = timezone.now()
+
+    return Bill(
+        legiscan_bill_id=str(bill_data["bill_id"]),
+        bill_number=bill_data.get("bill_number"),
+        bill_title=(bill_data.get("title") or "")[:255] or None,
+        session_id=str(bill_data.get("session_id") or "") or None,
+        change_hash=bill_data.get("change_hash"),
+        description=bill_data.get("description"),
+        status=bill_data.get("status"),
+        status_date=_parse_date(bill_data.get("status_date")),
+        last_action=last_event.get("action"),
+        last_action_date=_parse_date(last_event.get("date")),
+        url=bill_data.get("url"),
+        state_link=bill_data.get("state_link"),
+        legiscan_data=bill_data,
+        synced_at=now,
+        changed_at=now,
+    )
+
+
+def upsert_bills(
+    bills_data: Iterable[dict], batch_size: int = 500, mark_changed: bool = True
+) -> int:
+    """
+    Insert or update mirrored bills from getBill payloads.
+
+    Rows are written in batches with a single upsert statement each.
+    Every written bill is marked synced, but only bills that are new or
+    whose change_hash differs are marked changed, and none without
+    mark_changed (e.g. for bulk imports the digest should not announce).
+    Returns the number of bills written.
+    """
+    written = 0
+    batch = []
+
+    for bill_data in bills_data:
+        batch.append(bill_from_legiscan(bill_data))
+
+        if len(batch) >= batch_size:
+            written += _upsert_batch(batch, mark_changed)
+            batch = []
+
+    if batch:
+        written += _upsert_batch(batch, mark_changed)
+
+    return written
+
+
+def _upsert_batch(batch: list, mark_changed: bool = True) -> int:
+    # changed_at only moves when the change_hash does
+    stored = {
+        bill_id: (change_hash, changed_at)
+        for bill_id, change_hash, changed_at in Bill.objects.filter(
+            legiscan_bill_id__in=[bill.legiscan_bill_id for bill in batch]
+        ).values_list("legiscan_bill_id", "change_hash", "changed_at")
+    }
+    for bill in batch:
+        change_hash, changed_at = stored.get(bill.legiscan_bill_id, (None, None))
+        if not mark_changed or (changed_at and change_hash == bill.change_hash):
+            bill.changed_at = changed_at
+
+    Bill.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=["legiscan_bill_id"],
+        update_fields=MIRROR_FIELDS,
+    )
+    return len(batch)
+
+
+def sync_session_bills(session_id: str, batch_size: int = 500) -> dict:
+    """
+    Bring the local bill mirror up to date for a session.
+
+    Pulls getMasterListRaw once, compares each bill's change_hash with
+    the stored one and only calls getBill for bills that changed; the
+    others are marked synced without being fetched. A run
+    that is not cut short by the Legiscan quota or rate limit is recorded
+    on AppSettings, see mirror_is_synced.
+    """
+    client = get_client()
+    masterlist = client.call(OP_MASTER_LIST_RAW, id=session_id).get("masterlist", {})
+    entries = [entry for key, entry in masterlist.items() if key != "session"]
+
+    stored_hashes = dict(
+        Bill.objects.filter(
+            legiscan_bill_id__in=[str(entry["bill_id"]) for entry in entries]
+        ).values_list("legiscan_bill_id", "change_hash")
+    )
+    changed = [
+        entry
+        for entry in entries
+        if stored_hashes.get(str(entry["bill_id"])) != entry["change_hash"]
+    ]
+
+    # Listed bills with the stored change_hash are confirmed current
+    unchanged = [
+        str(entry["bill_id"])
+        for entry in entries
+        if stored_hashes.get(str(entry["bill_id"])) == entry["change_hash"]
+    ]
+    synced_at = timezone.now()
+    for start in range(0, len(unchanged), batch_size):
+        Bill.objects.filter(
+            legiscan_bill_id__in=unchanged[start : start + batch_size]
+        ).update(synced_at=synced_at)
+
+    stopped = False
+
+    def changed_bills():
+        nonlocal stopped
+        for entry in changed:
+            try:
+                payload = client.cached_call(
+                    OP_GET_BILL, change_hash=entry["change_hash"], id=entry["bill_id"]
+                )
+            except LegiscanUnavailable as e:
+                # Keep what was synced so far, the next run picks up the rest
+                logger.warning("Stopping bill sync early: %s", e)
+                stopped = True
+                return
+            except LegiscanError as e:
+                logger.error("Failed to sync bill %s: %s", entry["bill_id"], e)
+                continue
+            yield payload["bill"]
+
+    written = upsert_bills(changed_bills(), batch_size=batch_size)
+    if not stopped:
+        AppSettings.objects.update_or_create(
+            id=1,
+            defaults={
+                "mirror_session_id": session_id,
+                "mirror_synced_at": timezone.now(),
+            },
+        )
+
+    logger.info(
+        "Synced session %s: %s bills listed, %s changed, %s written",
+        session_id,
+        len(entries),
+        len(changed),
+        written,
+    )
+    return {"listed": len(entries), "changed": len(changed), "written": written}
+
+
+def refresh_bill(legiscan_bill_id, allow_stale: bool = False) -> Optional[dict]:
+    """
+    Fetch a bill from Legiscan and upsert it into the mirror.
+
+    The fetch goes through the response cache, so concurrent refreshes of
+    the same bill (e.g. a popular bill missing from the mirror) share one
+    getBill request. With allow_stale, a failed fetch returns the
+    last-known-good payload instead; it is not written to the mirror,
+    which may already hold newer data.
+
+    Returns the getBill payload, or None if the fetch failed. Raises
+    LegiscanUnavailable when the quota or rate limit is reached and there
+    is nothing else to serve.
+    """
+    client = get_client()
+    params = {"id": legiscan_bill_id}
+    try:
+        payload = client.cached_call(OP_GET_BILL, allow_stale=False, **params)
+    except LegiscanError as e:
+        payload = client.stale(OP_GET_BILL, params, e) if allow_stale else None
+        if payload is not None:
+            return payload["bill"]
+        if isinstance(e, LegiscanUnavailable):
+            raise
+        logger.error("Failed to refresh bill %s: %s", legiscan_bill_id, e)
+        return None
+
+    bill_data = payload["bill"]
+    upsert_bills([bill_data])
+    return bill_data
+
+
+def is_stale(bill: Bill) -> bool:
+    """Whether a mirrored bill was last synced over BILL_MIRROR_STALE_AFTER ago."""
+    max_age = timedelta(seconds=settings.BILL_MIRROR_STALE_AFTER)
+    return bill.synced_at is None or timezone.now() - bill.synced_at > max_age
+
+
+def schedule_bill_refresh(bill: Bill) -> bool:
+    """
+    Queue a background refresh for a stale mirrored bill.
+
+    At most one refresh per bill is queued per stale window. Returns True
+    if a refresh was queued.
+    """
+    if not is_stale(bill):
+        return False
+
+    lock_key = f"bill:refresh:{bill.legiscan_bill_id}"
+    if not cache.add(lock_key, True, settings.BILL_MIRROR_STALE_AFTER):
+        return False
+
+    async_task(refresh_bill, bill.legiscan_bill_id)
+    return True
+
+
+def delivered_change_hashes(user_ids: Iterable[int]) -> dict:
+    """Return {(user_id, legiscan_bill_id): change_hash} of past digests."""
+    deliveries = DigestDelivery.objects.filter(user_id__in=user_ids).values_list(
+        "user_id", "legiscan_bill_id", "change_hash"
+    )
+    return {
+        (user_id, bill_id): change_hash for user_id, bill_id, change_hash in deliveries
+    }
+
+
+def record_digest_deliveries(deliveries: Iterable[tuple], delivered_at=None) -> int:
+    """
+    Record bills sent in digests.
+
+    :param deliveries: (user_id, legiscan_bill_id, change_hash) tuples.
+    :return: number of ledger rows written.
+    """
+    delivered_at = delivered_at or timezone.now()
+    rows = {
+        (user_id, str(bill_id)): DigestDelivery(
+            user_id=user_id,
+            legiscan_bill_id=str(bill_id),
+            change_hash=change_hash,
+            delivered_at=delivered_at,
+        )
+        for user_id, bill_id, change_hash in deliveries
+    }
+    DigestDelivery.objects.bulk_create(
+        rows.values(),
+        update_conflicts=True,
+        unique_fields=["user", "legiscan_bill_id"],
+        update_fields=["change_hash", "delivered_at"],
+    )
+    return len(rows)
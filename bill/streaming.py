@@ -0,0 +1,85 @@
+"""
+Streaming JSON responses for large Legiscan-derived lists.
+
+Lists are encoded a chunk of items at a time while the response is sent,
+so the encoded body is never held in memory whole and the first bytes
+go out before the last item is encoded.
+
+Clients opt in with ?stream=json, for the usual response shape sent in
+chunks, or ?stream=ndjson, for newline delimited JSON: a first line with
+everything but the list, then one line per item.
+"""
+
+from typing import Iterable, Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+STREAM_PARAM = "stream"
+STREAM_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+CHUNK_SIZE = 100
+
+# Compact, like rest_framework's JSONRenderer
+encoder = DjangoJSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def stream_format(params) -> Optional[str]:
+    """
+    The requested stream format, or None for a regular response.
+
+    Raises ValueError for an unknown format.
+    """
+    fmt = params.get(STREAM_PARAM)
+    if fmt and fmt not in STREAM_FORMATS:
+        raise ValueError(f"{STREAM_PARAM} must be one of {', '.join(STREAM_FORMATS)}.")
+    return fmt or None
+
+
+def batches(items: Iterable) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == CHUNK_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def json_chunks(envelope: dict, key: str, items: Iterable) -> Iterator[str]:
+    """Encode {**envelope, key: [*items]} in chunks."""
+    head = encoder.encode(envelope)[:-1]
+    yield f"{head}{',' if envelope else ''}{encoder.encode(key)}:["
+
+    separator = ""
+    for batch in batches(items):
+        yield separator + ",".join(encoder.encode(item) for item in batch)
+        separator = ","
+
+    yield "]}"
+
+
+def ndjson_chunks(envelope: dict, items: Iterable) -> Iterator[str]:
+    """Encode envelope, then every item, one per line."""
+    yield encoder.encode(envelope) + "\n"
+
+    for batch in batches(items):
+        yield "".join(encoder.encode(item) + "\n" for item in batch)
+
+
+def chunks(fmt: str, envelope: dict, key: str, items: Iterable) -> Iterator[str]:
+    if fmt == "ndjson":
+        return ndjson_chunks(envelope, items)
+    return json_chunks(envelope, key, items)
+
+
+def streaming_response(
+    fmt: str, envelope: dict, key: str, items: Iterable
+) -> StreamingHttpResponse:
+    """Stream {**envelope, key: [*items]} in the requested format."""
+    return StreamingHttpResponse(
+        chunks(fmt, envelope, key, items), content_type=STREAM_FORMATS[fmt]
+    )
@@ -0,0 +1,195 @@
+"""
+Offline Legiscan stand-in.
+
+Serves recorded Legiscan responses ("cassettes") over HTTP so the app can
+be run, benchmarked and load tested without api.legiscan.com. Point
+LEGISCAN_BASE_URL at it, see the legiscan_stub management command.
+"""
+
+import copy
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Optional
+from urllib.parse import parse_qsl
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import requests
+
+from .legiscan import OP_GET_BILL
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that do not select a response
+IGNORED_PARAMS = ("key", "op")
+
+
+class Cassette:
+    """
+    Recorded Legiscan responses, one JSON file per operation.
+
+    Each file looks like
+    {"op": "getBill", "responses": [{"params": {...}, "response": {...}}]}.
+    Requests without an exact recording are answered with the op's first
+    response; for getBill the requested bill_id is patched in, so any id
+    can be fetched.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.responses: dict[str, dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+        for file in sorted(self.path.glob("*.json")):
+            with open(file) as f:
+                data = json.load(f)
+            for entry in data["responses"]:
+                self.add(data["op"], entry["params"], entry["response"])
+
+    @staticmethod
+    def params_key(params: dict) -> str:
+        return json.dumps(
+            {k: str(v) for k, v in params.items() if k not in IGNORED_PARAMS},
+            sort_keys=True,
+        )
+
+    def add(self, op: str, params: dict, response: dict) -> None:
+        """Add a recording in memory."""
+        self.responses.setdefault(op, {})[self.params_key(params)] = response
+
+    def find(self, op: str, params: dict, fallback: bool = True) -> Optional[dict]:
+        """Return the response recorded for (op, params), or a fallback."""
+        recordings = self.responses.get(op)
+        if not recordings:
+            return None
+
+        response = recordings.get(self.params_key(params))
+        if response is not None or not fallback:
+            return response
+
+        response = next(iter(recordings.values()))
+        if op == OP_GET_BILL and str(params.get("id", "")).isdigit():
+            response = copy.deepcopy(response)
+            response["bill"]["bill_id"] = int(params["id"])
+        return response
+
+    def record(self, op: str, params: dict, response: dict) -> None:
+        """Add a recording and save the op's file."""
+        with self._lock:
+            self.add(op, params, response)
+
+            entries = [
+                {"params": json.loads(key), "response": value}
+                for key, value in self.responses[op].items()
+            ]
+            with open(self.path / f"{op}.json", "w") as f:
+                json.dump({"op": op, "responses": entries}, f, indent=2)
+                f.write("\n")
+
+
+class LegiscanStub:
+    """
+    WSGI app answering Legiscan requests from a Cassette.
+
+    Every request is delayed by `latency` seconds (plus up to `jitter`)
+    and fails with `error_status` at `error_rate`. With `record_url` set,
+    requests missing from the cassette are forwarded there (i.e. to the
+    real API) and the responses recorded.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        error_status: int = 503,
+        record_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.record_url = record_url
+        self.api_key = api_key
+        self.random = random.Random(seed)
+
+    def __call__(self, environ, start_response):
+        params = dict(parse_qsl(environ.get("QUERY_STRING", "")))
+        op = params.get("op")
+
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+        if self.random.random() < self.error_rate:
+            return self.respond(
+                start_response,
+                self.error_status,
+                {"status": "ERROR", "alert": {"message": "Injected error"}},
+            )
+
+        # When recording, only exact recordings are replayed
+        payload = self.cassette.find(op, params, fallback=not self.record_url)
+        if payload is None and self.record_url:
+            payload = self.fetch(op, params)
+        if payload is None:
+            payload = {
+                "status": "ERROR",
+                "alert": {"message": f"No recorded response for {op}"},
+            }
+
+        return self.respond(start_response, 200, payload)
+
+    def fetch(self, op: str, params: dict) -> Optional[dict]:
+        """Fetch a response from record_url and record it."""
+        query = dict(params, key=self.api_key)
+        try:
+            payload = requests.get(self.record_url, params=query, timeout=30).json()
+        except (requests.RequestException, ValueError) as e:
+            logger.error("Recording %s failed: %s", op, e)
+            return None
+
+        if payload.get("status") != "ERROR":
+            self.cassette.record(op, params, payload)
+        return payload
+
+    @staticmethod
+    def respond(start_response, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        reason = "OK" if status == 200 else "Error"
+        start_response(
+            f"{status} {reason}",
+            [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+            ],
+        )
+        return [body]
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """Serve requests concurrently so injected latency does not queue."""
+
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Log requests at debug level instead of printing them."""
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def make_stub_server(app: LegiscanStub, host: str = "127.0.0.1", port: int = 0):
+    """Create a threaded HTTP server for the stub; port 0 picks a free one."""
+    return make_server(
+        host, port, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler
+    )
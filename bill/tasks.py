@@ -1,25 +1,58 @@
 """Bill tasks."""
 
 import logging
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 from django.conf import settings
 from django.core.mail import send_mail
+from django.db.models import QuerySet
+from django.utils import timezone
 from django_q.tasks import Schedule, async_task
 from celery import shared_task
 
-from typing import Callable, Dict, List
+from typing import Callable, Dict, Iterable, List, Optional
 from typing_extensions import TypeAlias
 
-from .models import User, UserKeyword, AppSettings, UserBillInteraction
-from .legiscan import text_search_state_no_summary, fetch_latest_session_id
+from .models import User, UserKeyword, AppSettings, UserBillInteraction, Bill
+from .legiscan import (
+    OPS,
+    text_search_state_no_summary,
+    fetch_latest_session_id,
+    search_many,
+)
+from .matching import KeywordIndex
+from .quota import LegiscanQuota
+from .search import search_result
 from .emails import format_email_digest
-from .services import transition_session
+from .services import (
+    mirror_is_synced,
+    transition_session,
+    sync_session_bills,
+    delivered_change_hashes,
+    record_digest_deliveries,
+)
 
 KeywordBills: TypeAlias = Dict[str, List[dict]]
 UserKeywordsBills: TypeAlias = Dict[User, KeywordBills]
 
 logger = logging.getLogger(__name__)
 
+# How far back the digest looks for changed bills
+DIGEST_WINDOW = timedelta(days=1)
+# Rows fetched per round trip when streaming large querysets
+QUERY_CHUNK_SIZE = 2000
+# Bill fields the digest matches on and sends, see search_result
+DIGEST_BILL_FIELDS = (
+    "legiscan_bill_id",
+    "bill_number",
+    "bill_title",
+    "description",
+    "change_hash",
+    "url",
+    "last_action",
+    "last_action_date",
+)
+
 
 def is_upcoming_bill(bill: dict) -> bool:
     """Checks if a bill has a status_date or last_action_date from today onward."""
@@ -27,17 +60,21 @@ def is_upcoming_bill(bill: dict) -> bool:
 
     def is_upcoming_date(date_str):
         """date_str is today or in the future."""
+        if not date_str:
+            return False
         date = datetime.strptime(date_str, "%Y-%m-%d").date()
         return date >= today
 
-    return is_upcoming_date(bill["last_action_date"])
+    return is_upcoming_date(bill.get("last_action_date"))
 
 
 def format_bill(bill: dict) -> dict:
     """Formats a bill to include frontend URL."""
     return {
+        "bill_id": bill["bill_id"],
         "bill_number": bill["bill_number"],
         "title": bill["title"],
+        "change_hash": bill.get("change_hash"),
         "url": f"{settings.BASE_FRONTEND_URL}/bill/{bill['bill_id']}",
     }
 
@@ -58,76 +95,201 @@ def get_matching_bills_for_keyword(
     return keyword_cache[keyword]
 
 
-def bills_for_user_keywords(
-    text_search_func: Callable[[str], list] = text_search_state_no_summary,
-) -> UserKeywordsBills:
-    """Fetch new bills and send a single HTML digest email per user, optimizing for shared keywords."""
-    user_bill_map = {}  # {(user, keyword): [bills]}
-    keyword_cache = {}  # Cache to store search results per keyword
+def ignored_bill_numbers_by_user(user_ids: Iterable[int]) -> Dict[int, set]:
+    """Return {user_id: {bill_number}} of ignored bills in a single query."""
+    ignored_bills_by_user = defaultdict(set)
+    ignored = (
+        UserBillInteraction.objects.filter(user_id__in=user_ids, ignore=True)
+        .values_list("user_id", "bill__bill_number")
+        .iterator(chunk_size=QUERY_CHUNK_SIZE)
+    )
+
+    for user_id, bill_number in ignored:
+        ignored_bills_by_user[user_id].add(bill_number)
+
+    return ignored_bills_by_user
+
+
+def changed_bills(since: datetime) -> QuerySet:
+    """
+    Mirrored bills whose change_hash changed since a given time.
+
+    Only the fields the digest needs are loaded, never the raw Legiscan
+    payload.
+    """
+    return Bill.objects.filter(changed_at__gte=since).only(*DIGEST_BILL_FIELDS)
+
 
-    # Get all users who have saved keywords
-    users = set(UserKeyword.objects.values_list("user", flat=True))
+def digest_since() -> datetime:
+    """Start of the digest window: the last digest run, or DIGEST_WINDOW ago."""
+    app_settings = AppSettings.objects.filter(id=1).first()
+
+    if app_settings and app_settings.last_digest_at:
+        return app_settings.last_digest_at
+    return timezone.now() - DIGEST_WINDOW
+
+
+def match_keywords_in_bills(bills: Iterable[Bill]) -> Dict[tuple, List[dict]]:
+    """
+    Match every user keyword against bills in a single pass.
 
-    # Get ignored bills for each user
-    ignored_bills_by_user = {
-        user_id: set(
-            UserBillInteraction.objects.filter(
-                user_id=user_id, ignore=True
-            ).values_list("bill__bill_number", flat=True)
+    Builds one inverted index over all UserKeyword entries, then scans each
+    bill once, so the cost scales with the number of bills rather than
+    users x keywords.
+
+    :return: {(user_id, keyword): [matching bills]}
+    """
+    index = KeywordIndex()
+    keywords = UserKeyword.objects.values_list("user_id", "keyword").iterator(
+        chunk_size=QUERY_CHUNK_SIZE
+    )
+    for user_id, keyword in keywords:
+        index.add(keyword, (user_id, keyword.lower()))
+
+    documents = (
+        (
+            search_result(bill),
+            " ".join(
+                filter(None, [bill.bill_number, bill.bill_title, bill.description])
+            ),
         )
-        for user_id in users
-    }
+        for bill in bills
+    )
+    return index.match_all(documents)
+
 
-    # Iterate through UserKeyword entries
-    for entry in UserKeyword.objects.select_related("user"):
-        user = entry.user
+def match_keywords_with_search(
+    text_search_func: Callable[[str], list],
+) -> Dict[tuple, List[dict]]:
+    """
+    Match user keywords by running one search per distinct keyword.
+
+    Searches run concurrently, see legiscan.search_many.
+
+    :return: {(user_id, keyword): [matching bills]}
+    """
+    matches = {}
+    keyword_cache = {}  # Cache to store search results per keyword
+
+    # Run the searches for all distinct keywords concurrently up front
+    distinct_keywords = UserKeyword.objects.values_list("keyword", flat=True)
+    keyword_cache.update(
+        search_many(
+            (keyword.lower() for keyword in distinct_keywords.order_by().distinct()),
+            text_search_func,
+        )
+    )
+
+    keywords = UserKeyword.objects.only("user_id", "keyword").iterator(
+        chunk_size=QUERY_CHUNK_SIZE
+    )
+    for entry in keywords:
         keyword = entry.keyword.lower()
-        ignored_bill_numbers = ignored_bills_by_user.get(user.id, set())
 
         # Get matching bills using caching function
         matching_bills = get_matching_bills_for_keyword(
             keyword, text_search_func, keyword_cache
         )
 
-        # Filter out ignored and non-upcoming bills
-        filtered_bills = list(
-            map(
-                format_bill,
-                filter(
-                    lambda bill: bill["bill_number"] not in ignored_bill_numbers,
-                    matching_bills,
-                ),
+        if matching_bills:
+            matches[(entry.user_id, keyword)] = matching_bills
+
+    return matches
+
+
+def bills_for_user_keywords(
+    text_search_func: Optional[Callable[[str], list]] = None,
+    bills: Optional[Iterable[Bill]] = None,
+) -> UserKeywordsBills:
+    """
+    Collect bills matching each user's keywords for the daily digest.
+
+    By default keywords are matched locally against mirrored bills that
+    changed since the last digest run. Pass text_search_func to search
+    each keyword instead (e.g. against Legiscan when there is no mirror).
+
+    Bills already sent to a user are skipped until their change_hash
+    changes, see DigestDelivery.
+    """
+    if text_search_func is not None:
+        matches = match_keywords_with_search(text_search_func)
+    else:
+        if bills is None:
+            bills = changed_bills(since=digest_since()).iterator(
+                chunk_size=QUERY_CHUNK_SIZE
             )
-        )
+        matches = match_keywords_in_bills(bills)
 
-        if filtered_bills:
-            user_bill_map.setdefault((user, keyword), []).extend(filtered_bills)
+    matched_user_ids = {user_id for user_id, _ in matches}
+    users_by_id = User.objects.in_bulk(matched_user_ids)
+    delivered = delivered_change_hashes(matched_user_ids)
+    ignored_bills_by_user = ignored_bill_numbers_by_user(matched_user_ids)
 
-    # Reorganize data to group by user
+    def is_new_to_user(user_id, bill):
+        """Bill was never sent to the user, or changed since it was."""
+        key = (user_id, str(bill["bill_id"]))
+        return key not in delivered or delivered[key] != bill.get("change_hash")
+
+    # Filter out ignored and already delivered bills, group by user
     user_emails = {}
-    for (user, keyword), bills in user_bill_map.items():
-        user_emails.setdefault(user, {})[keyword] = bills
+    for (user_id, keyword), matching_bills in matches.items():
+        ignored_bill_numbers = ignored_bills_by_user.get(user_id, set())
+        filtered_bills = [
+            format_bill(bill)
+            for bill in matching_bills
+            if bill["bill_number"] not in ignored_bill_numbers
+            and is_new_to_user(user_id, bill)
+        ]
+
+        if filtered_bills:
+            user_emails.setdefault(users_by_id[user_id], {})[keyword] = filtered_bills
 
     return user_emails
 
 
+def send_digest(email: str, subject: str, body: str, deliveries: list) -> None:
+    """
+    Send one user's digest, then record its bills as delivered.
+
+    Queued by send_mail_for_keywords. A failed send raises before anything
+    is recorded, so the bills are not kept out of later digests.
+
+    :param deliveries: (user_id, legiscan_bill_id, change_hash) tuples.
+    """
+    send_mail(
+        subject,
+        "",
+        settings.DEFAULT_FROM_EMAIL,
+        [email],
+        fail_silently=False,
+        html_message=body,
+    )
+    record_digest_deliveries(deliveries)
+
+
 def send_mail_for_keywords() -> None:
     """Send mail for keywords."""
-    user_emails_data = bills_for_user_keywords(text_search_state_no_summary)
+    started_at = timezone.now()
 
-    # Send a single email per user
+    if mirror_is_synced():
+        user_emails_data = bills_for_user_keywords()
+    else:
+        # No local mirror yet, search Legiscan for every keyword
+        user_emails_data = bills_for_user_keywords(text_search_state_no_summary)
+
+    # Send a single email per user, remembering what each user was told so
+    # the next digest only has changes
     for user, keyword_dict in user_emails_data.items():
         email_subject, email_body = format_email_digest(user, keyword_dict)
+        deliveries = [
+            (user.id, bill["bill_id"], bill["change_hash"])
+            for bills in keyword_dict.values()
+            for bill in bills
+        ]
 
-        async_task(
-            send_mail,
-            email_subject,
-            "",
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-            html_message=email_body,
-        )
+        async_task(send_digest, user.email, email_subject, email_body, deliveries)
+
+    AppSettings.objects.update_or_create(id=1, defaults={"last_digest_at": started_at})
 
     return f"Queued {len(user_emails_data)} HTML digest emails."
 
@@ -151,3 +313,24 @@ def check_for_new_session_task():
 
     except Exception as e:
         logger.error("Failed to run session check: %s", e)
+
+
+@shared_task
+def sync_bills_task():
+    """Record Legiscan usage, then sync the bill mirror for the current session."""
+    try:
+        LegiscanQuota.from_settings().flush(OPS)
+    except Exception as e:
+        logger.error("Failed to record Legiscan usage: %s", e)
+
+    app_settings, _ = AppSettings.objects.get_or_create(id=1)
+    session_id = app_settings.current_session_id
+
+    if not session_id:
+        logger.info("No current session set. Skipping bill sync.")
+        return
+
+    try:
+        sync_session_bills(session_id)
+    except Exception as e:
+        logger.error("Failed to sync bills for session %s: %s", session_id, e)
@@ -1,6 +1,17 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 
-from ..filters import filter_by_chamber, filter_by_type, search_by_bill_number
+from ..filters import (
+    BillNumberIndex,
+    filter_by_chamber,
+    filter_by_type,
+    filter_master_list,
+    master_list_bills,
+    master_list_index,
+    master_list_page,
+    search_by_bill_number,
+)
 
 
 class BillFilterTests(TestCase):
@@ -107,3 +118,87 @@ class BillFilterTests(TestCase):
             },
         ]
         self.assertEqual(result, expected)
+
+    # 4. Test for BillNumberIndex
+    def test_index_is_reusable_across_filters(self):
+        index = BillNumberIndex(self.bills)
+
+        self.assertEqual(
+            filter_by_chamber("House", index), filter_by_chamber("House", self.bills)
+        )
+        self.assertEqual(
+            filter_by_type("Bill", index), filter_by_type("Bill", self.bills)
+        )
+        self.assertEqual(
+            search_by_bill_number("200", index),
+            search_by_bill_number("200", self.bills),
+        )
+
+    def test_search_by_bill_number_combined(self):
+        result = search_by_bill_number("sb200", self.bills)
+        expected = [
+            {"bill_number": "SB2001", "title": "Senate Bill 2001"},
+            {"bill_number": "SB200", "title": "Senate Bill 200"},
+        ]
+        self.assertEqual(result, expected)
+
+    def test_search_by_bill_number_digits_anywhere(self):
+        result = search_by_bill_number("001", self.bills)
+        self.assertEqual(
+            [bill["bill_number"] for bill in result],
+            ["HB1001", "SB2001", "HR3001", "SJR4001"],
+        )
+
+
+class MasterListIndexTests(TestCase):
+    """Tests for the memoized master list index."""
+
+    def master_list(self, change_hash="a"):
+        return {
+            "session": {"session_id": 2000},
+            "0": {"bill_id": 1, "number": "HB1", "change_hash": change_hash},
+            "1": {"bill_id": 2, "number": "SB2", "change_hash": "b"},
+        }
+
+    def test_index_is_built_once_per_master_list(self):
+        index = master_list_index(self.master_list())
+
+        self.assertIs(master_list_index(self.master_list()), index)
+        self.assertIsNot(master_list_index(self.master_list("changed")), index)
+
+    def test_index_only_for_number_filters(self):
+        master_list = self.master_list()
+
+        self.assertIsInstance(master_list_bills(master_list, {}), list)
+        self.assertIsInstance(
+            master_list_bills(master_list, {"chamber": "Senate"}), BillNumberIndex
+        )
+
+    def test_filters_match_with_and_without_index(self):
+        master_list = self.master_list()
+        bills = [bill for key, bill in master_list.items() if key != "session"]
+
+        for params in ({}, {"chamber": "Senate"}, {"bill_number": "1"}):
+            self.assertEqual(
+                filter_master_list(master_list_bills(master_list, params), params),
+                filter_master_list(bills, params),
+            )
+
+    def test_pages_share_one_index(self):
+        master_list = self.master_list("paged")
+        params = {"bill_number": "2", "page_size": 1}
+
+        with patch.object(
+            BillNumberIndex,
+            "__init__",
+            autospec=True,
+            side_effect=BillNumberIndex.__init__,
+        ) as built:
+            pages = [
+                master_list_page(master_list, {**params, "page": page})
+                for page in (1, 2)
+            ]
+
+        self.assertEqual(built.call_count, 1)
+        self.assertEqual(pages[0]["bills"], [master_list["1"]])
+        self.assertEqual(pages[1]["bills"], [])
@@ -0,0 +1,81 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from bill.models import Bill
+from bill.search import search_bills, text_search_local
+from bill.services import upsert_bills
+from bill.tests.test_bill_sync import legiscan_bill
+
+
+class SearchBillsTests(TestCase):
+    """Tests for local full-text bill search."""
+
+    def setUp(self):
+        upsert_bills(
+            [
+                legiscan_bill(1, "a", title="Public School Funding"),
+                legiscan_bill(2, "b", title="Broadband Expansion Act"),
+                legiscan_bill(
+                    3,
+                    "c",
+                    title="Rural Healthcare",
+                    description="Concerning rural school nurses.",
+                ),
+            ]
+        )
+
+    def test_search_matches_title_and_description(self):
+        total, bills = search_bills("school")
+
+        self.assertEqual(total, 2)
+        self.assertEqual({bill.legiscan_bill_id for bill in bills}, {"1", "3"})
+
+    def test_search_requires_all_terms(self):
+        total, bills = search_bills("rural school")
+
+        self.assertEqual(total, 1)
+        self.assertEqual(bills[0].legiscan_bill_id, "3")
+
+    def test_search_is_case_insensitive(self):
+        total, _ = search_bills("BROADBAND")
+
+        self.assertEqual(total, 1)
+
+    def test_search_paginates(self):
+        total, bills = search_bills("school", page=2, page_size=1)
+
+        self.assertEqual(total, 2)
+        self.assertEqual(len(bills), 1)
+
+    def test_search_ignores_query_syntax(self):
+        total, bills = search_bills('"school* (')
+
+        self.assertEqual(total, 2)
+
+    def test_search_sees_updates(self):
+        upsert_bills([legiscan_bill(2, "b2", title="School Broadband")])
+
+        total, _ = search_bills("school")
+
+        self.assertEqual(total, 3)
+
+    def test_search_drops_deleted_bills(self):
+        Bill.objects.filter(legiscan_bill_id="1").delete()
+
+        total, _ = search_bills("school")
+
+        self.assertEqual(total, 1)
+
+    def test_search_results_look_like_legiscan(self):
+        _, results = text_search_local("broadband")
+
+        self.assertEqual(results[0]["bill_id"], 2)
+        self.assertEqual(results[0]["bill_number"], "HB2")
+        self.assertEqual(results[0]["last_action_date"], "2025-01-14")
+
+    def test_local_search_endpoint(self):
+        response = APIClient().get("/api/bill/search/local/?query=school&page_size=1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["summary"]["count"], 2)
+        self.assertEqual(len(response.data["bills"]), 1)
@@ -0,0 +1,212 @@
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+
+from bill import legiscan
+from bill.cache import LegiscanCache
+from bill.legiscan import LegiscanClient, LegiscanUnavailable
+from bill.models import AppSettings, Bill
+from bill.services import (
+    is_stale,
+    mirror_is_synced,
+    refresh_bill,
+    sync_session_bills,
+    upsert_bills,
+)
+
+
+def legiscan_bill(bill_id, change_hash, **overrides):
+    """Build a minimal getBill payload."""
+    bill = {
+        "bill_id": bill_id,
+        "change_hash": change_hash,
+        "session_id": 2000,
+        "bill_number": f"HB{bill_id}",
+        "title": f"Bill {bill_id}",
+        "description": f"Description {bill_id}",
+        "status": 1,
+        "status_date": "2025-01-13",
+        "url": f"https://legiscan.com/AR/bill/HB{bill_id}/2025",
+        "state_link": "https://arkleg.state.ar.us/",
+        "history": [{"date": "2025-01-14", "action": "Filed"}],
+    }
+    bill.update(overrides)
+    return bill
+
+
+def masterlist_raw(*bills):
+    masterlist = {"session": {"session_id": 2000}}
+    for i, bill in enumerate(bills):
+        masterlist[str(i)] = {
+            "bill_id": bill["bill_id"],
+            "number": bill["bill_number"],
+            "change_hash": bill["change_hash"],
+        }
+    return {"masterlist": masterlist}
+
+
+class UpsertBillsTests(TestCase):
+    """Tests for upsert_bills."""
+
+    def test_upsert_creates_mirrored_bills(self):
+        upsert_bills([legiscan_bill(1, "a"), legiscan_bill(2, "b")])
+
+        bill = Bill.objects.get(legiscan_bill_id="1")
+        self.assertEqual(Bill.objects.count(), 2)
+        self.assertEqual(bill.change_hash, "a")
+        self.assertEqual(bill.last_action, "Filed")
+        self.assertEqual(str(bill.last_action_date), "2025-01-14")
+        self.assertIsNotNone(bill.synced_at)
+
+    def test_upsert_keeps_admin_fields(self):
+        Bill.objects.create(
+            legiscan_bill_id="1", admin_note="Keep me", admin_stance="support"
+        )
+
+        upsert_bills([legiscan_bill(1, "a", title="Updated")])
+
+        bill = Bill.objects.get(legiscan_bill_id="1")
+        self.assertEqual(bill.bill_title, "Updated")
+        self.assertEqual(bill.admin_note, "Keep me")
+        self.assertEqual(bill.admin_stance, "support")
+
+    def test_upsert_handles_missing_dates(self):
+        upsert_bills([legiscan_bill(1, "a", status_date="0000-00-00", history=[])])
+
+        bill = Bill.objects.get(legiscan_bill_id="1")
+        self.assertIsNone(bill.status_date)
+        self.assertIsNone(bill.last_action_date)
+
+
+class SyncSessionBillsTests(TestCase):
+    """Tests for sync_session_bills."""
+
+    def setUp(self):
+        self.bills = {1: legiscan_bill(1, "a"), 2: legiscan_bill(2, "b")}
+        self.client = MagicMock()
+        self.client.call.return_value = masterlist_raw(*self.bills.values())
+        self.client.cached_call.side_effect = lambda op, change_hash, id: {
+            "bill": self.bills[id]
+        }
+
+    def test_sync_fetches_only_changed_bills(self):
+        upsert_bills([legiscan_bill(1, "a")])
+
+        with patch("bill.services.get_client", return_value=self.client):
+            result = sync_session_bills("2000")
+
+        self.assertEqual(result, {"listed": 2, "changed": 1, "written": 1})
+        self.client.cached_call.assert_called_once_with(
+            "getBill", change_hash="b", id=2
+        )
+        self.assertTrue(Bill.objects.filter(legiscan_bill_id="2").exists())
+
+    def test_sync_refetches_bill_with_new_change_hash(self):
+        upsert_bills([legiscan_bill(1, "old"), legiscan_bill(2, "b")])
+
+        with patch("bill.services.get_client", return_value=self.client):
+            result = sync_session_bills("2000")
+
+        self.assertEqual(result["changed"], 1)
+        self.assertEqual(Bill.objects.get(legiscan_bill_id="1").change_hash, "a")
+
+    def test_sync_marks_unchanged_bills_synced_but_not_changed(self):
+        upsert_bills([legiscan_bill(1, "a")])
+        earlier = timezone.now() - timedelta(days=1)
+        Bill.objects.update(synced_at=earlier, changed_at=earlier)
+
+        with patch("bill.services.get_client", return_value=self.client):
+            sync_session_bills("2000")
+
+        unchanged = Bill.objects.get(legiscan_bill_id="1")
+        self.assertGreater(unchanged.synced_at, earlier)
+        self.assertEqual(unchanged.changed_at, earlier)
+        self.assertFalse(is_stale(unchanged))
+
+    def test_completed_sync_marks_mirror_synced(self):
+        AppSettings.objects.create(id=1, current_session_id="2000")
+        upsert_bills([legiscan_bill(1, "a")])
+        self.assertFalse(mirror_is_synced())
+
+        with patch("bill.services.get_client", return_value=self.client):
+            sync_session_bills("2000")
+
+        self.assertTrue(mirror_is_synced())
+        self.assertEqual(AppSettings.objects.get(id=1).mirror_session_id, "2000")
+
+        # A new session is not mirrored until it is synced
+        AppSettings.objects.filter(id=1).update(current_session_id="2001")
+        self.assertFalse(mirror_is_synced())
+
+    def test_interrupted_sync_does_not_mark_mirror_synced(self):
+        AppSettings.objects.create(id=1, current_session_id="2000")
+        self.client.cached_call.side_effect = LegiscanUnavailable("quota")
+
+        with patch("bill.services.get_client", return_value=self.client):
+            sync_session_bills("2000")
+
+        self.assertFalse(mirror_is_synced())
+
+
+class RefreshBillTests(TestCase):
+    """Tests for refresh_bill."""
+
+    def setUp(self):
+        caches["legiscan"].clear()
+        cache = LegiscanCache("legiscan", ttls={"getBill": 60}, stale_ttl=600)
+        self.client = LegiscanClient(api_key="test-key", cache=cache)
+        patcher = patch.object(legiscan, "_client", self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def response(self, bill):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"status": "OK", "bill": bill}
+        return response
+
+    @patch("bill.services.upsert_bills")
+    def test_concurrent_misses_share_one_request(self, patched_upsert):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.1)
+            return self.response(legiscan_bill(1, "a"))
+
+        with patch.object(
+            self.client.session, "get", side_effect=slow_get
+        ) as patched_get:
+            threads = [
+                threading.Thread(target=refresh_bill, args=(1,)) for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(patched_get.call_count, 1)
+        self.assertEqual(patched_upsert.call_count, 5)
+
+    def test_serves_stale_payload_without_storing_it(self):
+        with patch.object(
+            self.client.session,
+            "get",
+            return_value=self.response(legiscan_bill(1, "a")),
+        ):
+            refresh_bill(1)
+        Bill.objects.all().delete()
+        self.client.cache.backend.delete(self.client.cache.key("getBill", {"id": 1}))
+
+        with patch.object(
+            self.client.session, "get", side_effect=requests.Timeout("slow")
+        ):
+            self.assertIsNone(refresh_bill(1))
+            bill_data = refresh_bill(1, allow_stale=True)
+
+        self.assertEqual(bill_data["change_hash"], "a")
+        self.assertFalse(Bill.objects.exists())
+        self.assertTrue(legiscan.served_stale.get())
+        legiscan.served_stale.set(False)
@@ -1,15 +1,42 @@
 from django.test import TestCase
 from django.utils.timezone import now
 from django.contrib.auth import get_user_model
-from bill.models import Bill, UserKeyword, UserBillInteraction
-from bill.tasks import bills_for_user_keywords, is_upcoming_bill
+from unittest.mock import patch
 
-from datetime import datetime, timedelta
+from bill.models import (
+    AppSettings,
+    Bill,
+    DigestDelivery,
+    UserKeyword,
+    UserBillInteraction,
+)
+from bill import legiscan
+from bill.exceptions import QuotaExhausted
+from bill.legiscan import RateLimiter
+from bill.matching import KeywordIndex
+from bill.services import record_digest_deliveries, upsert_bills
+from bill.tasks import (
+    bills_for_user_keywords,
+    changed_bills,
+    is_upcoming_bill,
+    send_digest,
+    send_mail_for_keywords,
+    sync_bills_task,
+    text_search_state_no_summary,
+)
+from bill.tests.test_bill_sync import legiscan_bill
+from app.celery import app as celery_app
 
+from datetime import datetime, timedelta
 
 User = get_user_model()
 
 
+def run_task(func, *args, **kwargs):
+    """Run a django_q task in place of queueing it."""
+    return func(*args, **kwargs)
+
+
 class IsUpcomingBillTest(TestCase):
     """Test suite for is_upcoming_bill(), now using only last_action_date."""
 
@@ -38,3 +65,225 @@ class IsUpcomingBillTest(TestCase):
         """A bill with no last_action_date should not be considered upcoming."""
         bill = {}
         self.assertFalse(is_upcoming_bill(bill))
+
+
+class SyncBillsScheduleTest(TestCase):
+    """The bill mirror sync runs periodically."""
+
+    def test_sync_bills_task_is_scheduled(self):
+        scheduled = {entry["task"] for entry in celery_app.conf.beat_schedule.values()}
+
+        self.assertIn(sync_bills_task.name, scheduled)
+
+
+class KeywordIndexTest(TestCase):
+    """Test suite for the digest keyword index."""
+
+    def setUp(self):
+        self.index = KeywordIndex()
+        self.index.add("School", ("u1", "school"))
+        self.index.add("public school", ("u2", "public school"))
+        self.index.add("broadband", ("u2", "broadband"))
+
+    def test_match_single_token_keyword(self):
+        self.assertEqual(
+            self.index.match("Funding for rural schools and school nurses"),
+            {("u1", "school")},
+        )
+
+    def test_match_requires_all_keyword_tokens(self):
+        self.assertEqual(
+            self.index.match("To amend public school funding"),
+            {("u1", "school"), ("u2", "public school")},
+        )
+
+    def test_match_all_groups_documents_by_subscriber(self):
+        matches = self.index.match_all(
+            [("b1", "public school funding"), ("b2", "broadband expansion")]
+        )
+
+        self.assertEqual(matches[("u1", "school")], ["b1"])
+        self.assertEqual(matches[("u2", "public school")], ["b1"])
+        self.assertEqual(matches[("u2", "broadband")], ["b2"])
+
+
+class BillsForUserKeywordsTest(TestCase):
+    """Test suite for bills_for_user_keywords()."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="user@example.com", password="pw")
+        self.other = User.objects.create_user(email="other@example.com", password="pw")
+        UserKeyword.objects.create(user=self.user, keyword="School")
+        UserKeyword.objects.create(user=self.other, keyword="broadband")
+        upsert_bills(
+            [
+                legiscan_bill(1, "a", title="Public School Funding"),
+                legiscan_bill(2, "b", title="Broadband Expansion Act"),
+                legiscan_bill(3, "c", title="Rural Healthcare"),
+            ]
+        )
+
+    def test_matches_changed_bills_per_user(self):
+        result = bills_for_user_keywords()
+
+        self.assertEqual(set(result), {self.user, self.other})
+        self.assertEqual(
+            [bill["bill_number"] for bill in result[self.user]["school"]], ["HB1"]
+        )
+        self.assertEqual(
+            [bill["bill_number"] for bill in result[self.other]["broadband"]],
+            ["HB2"],
+        )
+
+    def test_skips_bills_not_changed_recently(self):
+        Bill.objects.update(changed_at=now() - timedelta(days=3))
+
+        self.assertEqual(bills_for_user_keywords(), {})
+
+    def test_skips_bills_synced_again_without_changes(self):
+        Bill.objects.update(changed_at=now() - timedelta(days=3))
+        upsert_bills([legiscan_bill(1, "a", title="Public School Funding")])
+
+        self.assertEqual(bills_for_user_keywords(), {})
+
+    def test_skips_ignored_bills(self):
+        UserBillInteraction.objects.create(
+            user=self.user,
+            bill=Bill.objects.get(legiscan_bill_id="1"),
+            ignore=True,
+        )
+
+        result = bills_for_user_keywords()
+
+        self.assertNotIn(self.user, result)
+
+    def test_search_function_path(self):
+        def text_search_func(keyword):
+            return [{"bill_id": 9, "bill_number": "SB9", "title": keyword}]
+
+        result = bills_for_user_keywords(text_search_func)
+
+        self.assertEqual(result[self.user]["school"][0]["bill_number"], "SB9")
+        self.assertEqual(result[self.other]["broadband"][0]["bill_number"], "SB9")
+
+    def test_skips_bills_already_delivered(self):
+        record_digest_deliveries([(self.user.id, "1", "a")])
+
+        result = bills_for_user_keywords()
+
+        self.assertNotIn(self.user, result)
+        self.assertIn(self.other, result)
+
+    def test_includes_delivered_bills_that_changed(self):
+        record_digest_deliveries([(self.user.id, "1", "a")])
+        upsert_bills([legiscan_bill(1, "a2", title="Public School Funding")])
+
+        result = bills_for_user_keywords()
+
+        self.assertEqual(result[self.user]["school"][0]["change_hash"], "a2")
+
+    def test_only_bills_changed_since_last_digest(self):
+        AppSettings.objects.create(id=1, last_digest_at=now())
+        upsert_bills([legiscan_bill(2, "b2", title="Broadband Expansion Act")])
+
+        result = bills_for_user_keywords()
+
+        self.assertEqual(set(result), {self.other})
+
+    def test_changed_bills_skip_legiscan_payload(self):
+        bill = changed_bills(since=now() - timedelta(days=1)).first()
+
+        self.assertIn("legiscan_data", bill.get_deferred_fields())
+
+    def mark_mirror_synced(self):
+        AppSettings.objects.create(
+            id=1,
+            current_session_id="2000",
+            mirror_session_id="2000",
+            mirror_synced_at=now(),
+        )
+
+    @patch("bill.tasks.send_mail")
+    @patch("bill.tasks.format_email_digest", return_value=("subject", "body"))
+    @patch("bill.tasks.async_task", side_effect=run_task)
+    def test_send_mail_records_deliveries(self, patched_async_task, _, __):
+        self.mark_mirror_synced()
+
+        send_mail_for_keywords()
+        self.assertEqual(patched_async_task.call_count, 2)
+        self.assertEqual(DigestDelivery.objects.count(), 2)
+        self.assertIsNotNone(AppSettings.objects.get(id=1).last_digest_at)
+
+        # Nothing changed since, so the next run sends nothing
+        patched_async_task.reset_mock()
+        send_mail_for_keywords()
+        patched_async_task.assert_not_called()
+
+    @patch("bill.tasks.send_mail", side_effect=OSError("SMTP unavailable"))
+    def test_failed_send_records_no_delivery(self, _):
+        with self.assertRaises(OSError):
+            send_digest("user@example.com", "subject", "body", [(self.user.id, 1, "a")])
+
+        self.assertFalse(DigestDelivery.objects.exists())
+
+    @patch("bill.tasks.format_email_digest", return_value=("subject", "body"))
+    @patch("bill.tasks.async_task")
+    def test_send_mail_survives_quota_running_out(self, patched_async_task, _):
+        def search(keyword):
+            if keyword == "broadband":
+                raise QuotaExhausted("quota used up")
+            return [{"bill_id": 1, "bill_number": "HB1", "title": "School"}]
+
+        with patch("bill.tasks.text_search_state_no_summary", search), patch.object(
+            legiscan, "get_search_limiter", return_value=RateLimiter(0)
+        ):
+            send_mail_for_keywords()
+
+        # Only the user whose searches ran gets a digest
+        self.assertEqual(patched_async_task.call_count, 1)
+        self.assertEqual(patched_async_task.call_args.args[1], self.user.email)
+        self.assertIsNotNone(AppSettings.objects.get(id=1).last_digest_at)
+
+    @patch("bill.tasks.bills_for_user_keywords", return_value={})
+    def test_send_mail_searches_legiscan_until_mirror_synced(self, patched):
+        # Bills mirrored one at a time do not make a mirror
+        send_mail_for_keywords()
+
+        patched.assert_called_once_with(text_search_state_no_summary)
+
+
+class BillsForUserKeywordsQueryCountTest(TestCase):
+    """bills_for_user_keywords() query count must not grow with users."""
+
+    def add_subscribers(self, count):
+        bill = Bill.objects.get(legiscan_bill_id="1")
+        for i in range(count):
+            user = User.objects.create_user(
+                email=f"user{self.created + i}@example.com", password="pw"
+            )
+            UserKeyword.objects.create(user=user, keyword="school")
+            UserKeyword.objects.create(user=user, keyword="funding")
+            UserBillInteraction.objects.create(user=user, bill=bill, ignore=i % 2)
+        self.created += count
+
+    def setUp(self):
+        self.created = 0
+        upsert_bills(
+            [
+                legiscan_bill(1, "a", title="Public School Funding"),
+                legiscan_bill(2, "b", title="School Broadband"),
+            ]
+        )
+
+    def test_query_count_is_constant(self):
+        # digest window, changed bills, keywords, users, deliveries, ignored
+        self.add_subscribers(2)
+        with self.assertNumQueries(6):
+            small = bills_for_user_keywords()
+
+        self.add_subscribers(20)
+        with self.assertNumQueries(6):
+            large = bills_for_user_keywords()
+
+        self.assertEqual(len(small), 2)
+        self.assertEqual(len(large), 22)
@@ -0,0 +1,304 @@
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bill.models import Bill, Tag, UserBillInteraction
+from bill.services import upsert_bills
+from bill.tests.test_bill_sync import legiscan_bill
+
+User = get_user_model()
+
+
+class BillDetailViewTests(TestCase):
+    """Tests for serving BillDetailView from the local mirror."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="user@example.com", password="pw")
+        upsert_bills([legiscan_bill(1, "a")])
+        self.bill = Bill.objects.get(legiscan_bill_id="1")
+        self.bill.admin_note = "Admin note"
+        self.bill.save()
+
+    @patch("bill.services.async_task")
+    def test_get_serves_mirrored_bill_in_one_query(self, patched_async_task):
+        UserBillInteraction.objects.create(
+            user=self.user, bill=self.bill, stance="support"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/bill/1/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["bill_data"]["status"], "Introduced")
+        self.assertEqual(response.data["admin_info"]["admin_note"], "Admin note")
+        self.assertEqual(response.data["user_interaction"]["stance"], "support")
+        patched_async_task.assert_not_called()
+
+    @patch("bill.services.async_task")
+    def test_get_ignores_other_users_interactions(self, patched_async_task):
+        other = User.objects.create_user(email="other@example.com", password="pw")
+        UserBillInteraction.objects.create(user=other, bill=self.bill)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get("/api/bill/1/")
+
+        self.assertIsNone(response.data["user_interaction"])
+
+    @patch("bill.services.async_task")
+    def test_get_schedules_refresh_for_stale_bill_once(self, patched_async_task):
+        Bill.objects.filter(pk=self.bill.pk).update(
+            synced_at=timezone.now() - timedelta(days=1)
+        )
+
+        self.client.get("/api/bill/1/")
+        response = self.client.get("/api/bill/1/")
+
+        self.assertEqual(response.data["bill_data"]["bill_id"], 1)
+        patched_async_task.assert_called_once()
+
+    @patch("bill.services.async_task")
+    def test_get_answers_304_for_unchanged_bill(self, patched_async_task):
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get("/api/bill/1/")["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/bill/1/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    @patch("bill.services.async_task")
+    def test_etag_changes_with_interaction_and_legiscan_data(self, patched_async_task):
+        self.client.force_authenticate(user=self.user)
+        etags = [self.client.get("/api/bill/1/")["ETag"]]
+
+        UserBillInteraction.objects.create(user=self.user, bill=self.bill)
+        etags.append(self.client.get("/api/bill/1/")["ETag"])
+        upsert_bills([legiscan_bill(1, "b")])
+        etags.append(self.client.get("/api/bill/1/")["ETag"])
+
+        self.assertEqual(len(set(etags)), 3)
+
+    @patch("bill.views.refresh_bill")
+    def test_get_falls_back_to_legiscan_on_miss(self, patched_refresh):
+        patched_refresh.return_value = legiscan_bill(2, "b")
+
+        response = self.client.get("/api/bill/2/")
+
+        patched_refresh.assert_called_once_with("2", allow_stale=True)
+        self.assertEqual(response.data["bill_data"]["bill_number"], "HB2")
+        self.assertIsNone(response.data["user_interaction"])
+
+
+class UserBillInteractionListTests(TestCase):
+    """Tests for listing a user's interactions."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="user@example.com", password="pw")
+        self.client.force_authenticate(user=self.user)
+        upsert_bills(legiscan_bill(i, "a") for i in range(1, 6))
+        for i, bill in enumerate(Bill.objects.order_by("id")):
+            UserBillInteraction.objects.create(
+                user=self.user,
+                bill=bill,
+                stance="support" if i % 2 else "oppose",
+                is_archived=i == 0,
+            )
+
+    def test_pages_newest_first_with_cursor(self):
+        bill_ids = []
+        cursor = None
+
+        for _ in range(3):
+            params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/bill/user/interaction/", params)
+            bill_ids += [row["legiscan_bill_id"] for row in response.data["results"]]
+            cursor = response.data["next"]
+
+        self.assertEqual(bill_ids, [5, 4, 3, 2, 1])
+        self.assertIsNone(cursor)
+
+    def test_filters(self):
+        response = self.client.get(
+            "/api/bill/user/interaction/",
+            {"stance": "oppose", "is_archived": "false"},
+        )
+
+        bill_ids = [row["legiscan_bill_id"] for row in response.data["results"]]
+        self.assertEqual(bill_ids, [5, 3])
+
+    def test_invalid_parameters(self):
+        for params in ({"cursor": "nope"}, {"stance": "love"}, {"ignore": "maybe"}):
+            response = self.client.get("/api/bill/user/interaction/", params)
+
+            self.assertEqual(response.status_code, 400, params)
+
+
+class SearchByTagsTests(TestCase):
+    """Tests for searching bills by tags."""
+
+    def setUp(self):
+        self.client = APIClient()
+        upsert_bills(legiscan_bill(i, "a") for i in range(1, 5))
+        budget = Tag.objects.create(name="budget")
+        health = Tag.objects.create(name="health")
+        bills = {bill.legiscan_bill_id: bill for bill in Bill.objects.all()}
+        bills["1"].tags.set([budget, health])
+        bills["2"].tags.set([budget])
+        bills["3"].tags.set([health])
+
+    def search(self, **params):
+        return self.client.get("/api/bill/search-by-tags/", params)
+
+    def bill_ids(self, response):
+        return [bill["legiscan_bill_id"] for bill in response.data["bills"]]
+
+    def test_matches_all_tags_by_default(self):
+        with self.assertNumQueries(3):
+            response = self.search(tags="budget, health")
+
+        self.assertEqual(self.bill_ids(response), ["1"])
+        self.assertEqual(response.data["summary"]["count"], 1)
+
+    def test_matches_any_tag(self):
+        response = self.search(tags="budget,health", match="any")
+
+        self.assertEqual(self.bill_ids(response), ["1", "2", "3"])
+
+    def test_paginates(self):
+        response = self.search(tags="budget,health", match="any", page=2, page_size=2)
+
+        self.assertEqual(self.bill_ids(response), ["3"])
+        self.assertEqual(response.data["summary"]["count"], 3)
+
+    def test_no_match(self):
+        response = self.search(tags="budget,missing")
+
+        self.assertEqual(response.status_code, 404)
+
+
+@patch("bill.views.fetch_master_list")
+class MasterListViewTests(TestCase):
+    """Tests for filtering and paginating the master list server-side."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.master_list = {
+            "session": {"session_id": 2000},
+            "0": {"number": "HB1", "status": 1, "last_action_date": "2025-01-13"},
+            "1": {"number": "SB2", "status": 2, "last_action_date": "2025-02-04"},
+            "2": {"number": "HR3", "status": 1, "last_action_date": "2025-02-10"},
+            "3": {"number": "HB20", "status": 4, "last_action_date": "2025-03-01"},
+        }
+
+    def get(self, if_none_match=None, **params):
+        extra = {"HTTP_IF_NONE_MATCH": if_none_match} if if_none_match else {}
+        return self.client.get(
+            "/api/bill/search/bill/", {"session_id": 2000, **params}, **extra
+        )
+
+    def numbers(self, response):
+        return [bill["number"] for bill in response.data["bills"]]
+
+    def test_filters_server_side(self, patched_fetch):
+        patched_fetch.return_value = self.master_list
+
+        response = self.get(chamber="House", type="Bill")
+        self.assertEqual(self.numbers(response), ["HB1", "HB20"])
+
+        response = self.get(bill_number="2", status="2,4")
+        self.assertEqual(self.numbers(response), ["SB2", "HB20"])
+
+        response = self.get(from_date="2025-02-01", to_date="2025-02-28")
+        self.assertEqual(self.numbers(response), ["SB2", "HR3"])
+
+    def test_paginates_with_total_count(self, patched_fetch):
+        patched_fetch.return_value = self.master_list
+
+        response = self.get(page=2, page_size=3)
+
+        self.assertEqual(response.data["session"], {"session_id": 2000})
+        self.assertEqual(
+            response.data["summary"], {"count": 4, "page": 2, "page_size": 3}
+        )
+        self.assertEqual(self.numbers(response), ["HB20"])
+
+    def test_answers_304_for_unchanged_master_list(self, patched_fetch):
+        patched_fetch.return_value = self.master_list
+        etag = self.get(page=2)["ETag"]
+
+        response = self.get(etag, page=2)
+        self.assertEqual(response.status_code, 304)
+
+        self.assertNotEqual(self.get(page=1)["ETag"], etag)
+        self.master_list["0"]["change_hash"] = "changed"
+        self.assertNotEqual(self.get(page=2)["ETag"], etag)
+
+    def test_invalid_filters_are_rejected(self, patched_fetch):
+        patched_fetch.return_value = self.master_list
+
+        for params in ({"chamber": "Both"}, {"status": "new"}, {"to_date": "May"}):
+            response = self.get(**params)
+
+            self.assertEqual(response.status_code, 400, params)
+
+    @patch("bill.streaming.CHUNK_SIZE", 2)
+    def test_streams_json(self, patched_fetch):
+        patched_fetch.return_value = self.master_list
+
+        response = self.get(chamber="House", stream="json")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            json.loads(b"".join(response.streaming_content)),
+            {
+                "session": {"session_id": 2000},
+                "summary": {"count": 3},
+                "bills": [self.master_list[key] for key in ("0", "2", "3")],
+            },
+        )
+
+    def test_streams_ndjson(self, patched_fetch):
+        patched_fetch.return_value = self.master_list
+
+        response = self.get(type="Bill", stream="ndjson")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [
+                {"session": {"session_id": 2000}, "summary": {"count": 3}},
+                self.master_list["0"],
+                self.master_list["1"],
+                self.master_list["3"],
+            ],
+        )
+
+
+class AllTagsTests(TestCase):
+    """Tests for listing tags."""
+
+    def test_answers_304_until_tags_change(self):
+        client = APIClient()
+        Tag.objects.create(name="budget")
+        etag = client.get("/api/bill/tags/")["ETag"]
+
+        response = client.get("/api/bill/tags/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Tag.objects.create(name="health")
+        response = client.get("/api/bill/tags/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(response.data["tags"], ["budget", "health"])
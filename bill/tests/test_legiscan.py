@@ -0,0 +1,487 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bill import legiscan
+from bill.cache import LegiscanCache
+from bill.breaker import CircuitBreaker
+from bill.exceptions import CircuitOpen, QuotaExhausted, RateLimited
+from bill.legiscan import (
+    OPS,
+    LegiscanClient,
+    LegiscanError,
+    RateLimiter,
+    SingleFlight,
+    fetch_bill,
+    search_many,
+)
+from bill.models import LegiscanUsage
+from bill.quota import LegiscanQuota
+
+
+def mock_response(payload, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    return response
+
+
+class LegiscanClientTests(SimpleTestCase):
+    """Tests for the pooled Legiscan client."""
+
+    def setUp(self):
+        self.client = LegiscanClient(
+            api_key="test-key", connect_timeout=1, read_timeout=2
+        )
+
+    def test_call_passes_op_params_and_timeout(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({"bill": {}})
+        ) as patched_get:
+            self.client.call("getBill", id=42)
+
+        patched_get.assert_called_once_with(
+            legiscan.BASE_URL,
+            params={"key": "test-key", "op": "getBill", "id": 42},
+            timeout=(1, 2),
+        )
+
+    def test_call_reuses_session(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({})
+        ) as patched_get:
+            self.client.call("getSessionList", state="AR")
+            self.client.call("getSessionList", state="AR")
+
+        self.assertEqual(patched_get.call_count, 2)
+
+    def test_call_raises_on_bad_status(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({}, 500)
+        ):
+            with self.assertRaises(LegiscanError):
+                self.client.call("getBill", id=1)
+
+    def test_call_raises_on_legiscan_error_status(self):
+        payload = {"status": "ERROR", "alert": {"message": "Unknown bill id"}}
+        with patch.object(
+            self.client.session, "get", return_value=mock_response(payload)
+        ):
+            with self.assertRaisesMessage(LegiscanError, "Unknown bill id"):
+                self.client.call("getBill", id=1)
+
+    def test_call_raises_on_timeout(self):
+        with patch.object(
+            self.client.session, "get", side_effect=requests.Timeout("slow")
+        ):
+            with self.assertRaises(LegiscanError):
+                self.client.call("getBill", id=1)
+
+
+@override_settings(LEGISCAN_API_KEY="test-key")
+class FetchBillTests(SimpleTestCase):
+    """Tests for fetch_bill."""
+
+    def test_fetch_bill_replaces_status_code(self):
+        client = MagicMock()
+        client.cached_call.return_value = {"bill": {"bill_id": 1, "status": 1}}
+
+        with patch.object(legiscan, "get_client", return_value=client):
+            bill = fetch_bill(1)
+
+        self.assertEqual(bill["status"], "Introduced")
+
+    def test_fetch_bill_returns_error_string_on_failure(self):
+        client = MagicMock()
+        client.cached_call.side_effect = LegiscanError("getBill failed")
+
+        with patch.object(legiscan, "get_client", return_value=client):
+            bill = fetch_bill(1)
+
+        self.assertIsInstance(bill, str)
+
+
+class LegiscanCacheTests(SimpleTestCase):
+    """Tests for the Legiscan response cache."""
+
+    def setUp(self):
+        caches["legiscan"].clear()
+        self.cache = LegiscanCache(
+            alias="legiscan",
+            ttls={"getSessionList": 60, "getBill": 60},
+            hash_ttl=600,
+        )
+        self.client = LegiscanClient(api_key="test-key", cache=self.cache)
+
+    def test_cached_call_hits_cache_on_repeat(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({"sessions": []})
+        ) as patched_get:
+            self.client.cached_call("getSessionList", state="AR")
+            self.client.cached_call("getSessionList", state="AR")
+
+        self.assertEqual(patched_get.call_count, 1)
+        self.assertEqual(self.cache.stats()["getSessionList"], {"hits": 1, "misses": 1})
+
+    def test_cached_call_keys_on_params(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({})
+        ) as patched_get:
+            self.client.cached_call("getBill", id=1)
+            self.client.cached_call("getBill", id=2)
+
+        self.assertEqual(patched_get.call_count, 2)
+
+    def test_cached_call_keys_on_change_hash(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({})
+        ) as patched_get:
+            self.client.cached_call("getBill", change_hash="a", id=1)
+            self.client.cached_call("getBill", change_hash="a", id=1)
+            self.client.cached_call("getBill", change_hash="b", id=1)
+
+        self.assertEqual(patched_get.call_count, 2)
+
+    def test_uncached_op_always_calls(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({})
+        ) as patched_get:
+            self.client.cached_call("getSponsoredList", id=1)
+            self.client.cached_call("getSponsoredList", id=1)
+
+        self.assertEqual(patched_get.call_count, 2)
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Tests for coalescing concurrent identical Legiscan calls."""
+
+    def setUp(self):
+        caches["legiscan"].clear()
+        self.cache = LegiscanCache("legiscan", ttls={"getBill": 60})
+        self.client = LegiscanClient(api_key="test-key", cache=self.cache)
+
+    def run_concurrently(self, func, count=5):
+        barrier = threading.Barrier(count)
+
+        def call():
+            barrier.wait()
+            return func()
+
+        threads = []
+        results = []
+        for _ in range(count):
+            thread = threading.Thread(target=lambda: results.append(call()))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_request(self):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.1)
+            return mock_response({"bill": {"status": 1}})
+
+        with patch.object(
+            self.client.session, "get", side_effect=slow_get
+        ) as patched_get:
+            results = self.run_concurrently(
+                lambda: self.client.cached_call("getBill", id=1)
+            )
+
+        self.assertEqual(patched_get.call_count, 1)
+        self.assertEqual(results, [{"bill": {"status": 1}}] * 5)
+
+    def test_waiters_get_their_own_copy(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def leader_func():
+            started.set()
+            release.wait()
+            return {"status": 1}
+
+        leader_result = []
+        leader = threading.Thread(
+            target=lambda: leader_result.append(flights.do("k", leader_func))
+        )
+        leader.start()
+        started.wait()
+        follower_result = []
+        follower = threading.Thread(
+            target=lambda: follower_result.append(flights.do("k", lambda: None))
+        )
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        follower.join()
+
+        leader_result[0]["status"] = "Introduced"
+        self.assertEqual(follower_result[0], {"status": 1})
+
+    def test_errors_are_shared_and_not_remembered(self):
+        flights = SingleFlight()
+
+        with self.assertRaises(LegiscanError):
+            flights.do("k", MagicMock(side_effect=LegiscanError("down")))
+
+        self.assertEqual(flights.do("k", lambda: "ok"), "ok")
+
+    def test_waits_for_another_process_holding_the_lock(self):
+        client = LegiscanClient(api_key="test-key", cache=self.cache, coalesce_wait=1)
+        self.cache.lock("getBill", {"id": 1}, timeout=1)
+
+        def other_process():
+            time.sleep(0.1)
+            self.cache.set("getBill", {"id": 1}, {"bill": {"status": 1}})
+
+        threading.Thread(target=other_process).start()
+        with patch.object(client.session, "get") as patched_get:
+            payload = client.cached_call("getBill", id=1)
+
+        patched_get.assert_not_called()
+        self.assertEqual(payload, {"bill": {"status": 1}})
+
+
+@override_settings(LEGISCAN_SEARCH_CONCURRENCY=3)
+class SearchManyTests(SimpleTestCase):
+    """Tests for concurrent keyword searches."""
+
+    def setUp(self):
+        patcher = patch.object(
+            legiscan, "get_search_limiter", return_value=RateLimiter(0)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_search_many_maps_queries_to_results(self):
+        results = search_many(["a", "b", "a"], lambda query: [query.upper()])
+
+        self.assertEqual(results, {"a": ["A"], "b": ["B"]})
+
+    def test_search_many_skips_refused_queries(self):
+        def search(query):
+            if query == "b":
+                raise QuotaExhausted("quota used up")
+            return [query.upper()]
+
+        results = search_many(["a", "b", "c"], search)
+
+        self.assertEqual(results, {"a": ["A"], "b": [], "c": ["C"]})
+
+    def test_search_many_bounds_concurrency(self):
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def slow_search(query):
+            with lock:
+                active.append(query)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(query)
+            return []
+
+        search_many([str(i) for i in range(9)], slow_search)
+
+        self.assertEqual(max(peak), 3)
+
+
+class RateLimiterTests(SimpleTestCase):
+    """Tests for the search rate limiter."""
+
+    def test_acquire_spaces_calls(self):
+        limiter = RateLimiter(rate=50)
+
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - start, 4 / 50)
+
+
+class LegiscanQuotaTests(TestCase):
+    """Tests for Legiscan rate limiting and quota accounting."""
+
+    def setUp(self):
+        caches["legiscan"].clear()
+        self.quota = LegiscanQuota("legiscan", monthly_quota=3, rate_limit=100)
+        self.client = LegiscanClient(api_key="test-key", quota=self.quota)
+
+    def test_call_records_usage_per_op(self):
+        self.quota.month_count()
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({})
+        ), self.assertNumQueries(0):
+            self.client.call("getBill", id=1)
+            self.client.call("getBill", id=2)
+            self.client.call("getSessionList", state="AR")
+
+        self.assertEqual(self.quota.month_count(), 3)
+        self.assertFalse(LegiscanUsage.objects.exists())
+
+        self.assertEqual(self.quota.flush(OPS), 3)
+        usage = dict(LegiscanUsage.objects.values_list("op", "count"))
+        self.assertEqual(usage, {"getBill": 2, "getSessionList": 1})
+
+    def test_flush_adds_to_recorded_usage(self):
+        LegiscanUsage.objects.create(date=timezone.now().date(), op="getBill", count=3)
+        self.quota.record("getBill")
+
+        self.quota.flush(OPS)
+        self.quota.flush(OPS)
+
+        self.assertEqual(LegiscanUsage.objects.get(op="getBill").count, 4)
+
+    def test_call_fails_fast_when_quota_exhausted(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({})
+        ) as patched_get:
+            for bill_id in range(3):
+                self.client.call("getBill", id=bill_id)
+
+            with self.assertRaises(QuotaExhausted):
+                self.client.call("getBill", id=4)
+
+        self.assertEqual(patched_get.call_count, 3)
+
+    def test_month_count_is_seeded_from_usage(self):
+        LegiscanUsage.objects.create(date=timezone.now().date(), op="getBill", count=3)
+
+        with self.assertRaises(QuotaExhausted):
+            self.quota.acquire("getBill")
+
+    def test_rate_limit_fails_fast_after_max_wait(self):
+        quota = LegiscanQuota("legiscan", monthly_quota=0, rate_limit=2, max_wait=0)
+
+        with patch("bill.quota.time.time", return_value=1000.5):
+            quota.acquire("getBill")
+            quota.acquire("getBill")
+            with self.assertRaises(RateLimited):
+                quota.acquire("getBill")
+
+    def test_unavailable_legiscan_returns_503(self):
+        with patch(
+            "bill.legiscan.LegiscanClient.cached_call",
+            side_effect=QuotaExhausted("quota used up"),
+        ):
+            response = APIClient().get("/api/bill/search/session/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data, {"error": "quota used up"})
+        self.assertIn("Retry-After", response)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    """Tests for the Legiscan circuit breaker and stale fallback."""
+
+    def setUp(self):
+        caches["legiscan"].clear()
+        self.breaker = CircuitBreaker("legiscan", failure_threshold=2, reset_timeout=30)
+        self.cache = LegiscanCache("legiscan", ttls={"getBill": 60}, stale_ttl=600)
+        self.client = LegiscanClient(
+            api_key="test-key", cache=self.cache, breaker=self.breaker
+        )
+
+    def fail(self, times):
+        with patch.object(
+            self.client.session, "get", side_effect=requests.Timeout("slow")
+        ):
+            for _ in range(times):
+                with self.assertRaises(LegiscanError):
+                    self.client.call("getBill", id=1)
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail(2)
+
+        with patch.object(self.client.session, "get") as patched_get:
+            with self.assertRaises(CircuitOpen):
+                self.client.call("getBill", id=1)
+
+        patched_get.assert_not_called()
+
+    def test_success_resets_failure_count(self):
+        self.fail(1)
+        with patch.object(self.client.session, "get", return_value=mock_response({})):
+            self.client.call("getBill", id=1)
+        self.fail(1)
+
+        self.assertFalse(self.breaker.is_open())
+
+    def test_legiscan_error_status_does_not_count(self):
+        payload = {"status": "ERROR", "alert": {"message": "Unknown bill id"}}
+        with patch.object(
+            self.client.session, "get", return_value=mock_response(payload)
+        ):
+            for _ in range(3):
+                with self.assertRaises(LegiscanError):
+                    self.client.call("getBill", id=1)
+
+        self.assertFalse(self.breaker.is_open())
+
+    def test_lets_one_probe_through_after_reset_timeout(self):
+        self.fail(2)
+        self.assertFalse(self.breaker.allow())
+
+        with patch("bill.breaker.time.time", return_value=time.time() + 31):
+            self.assertTrue(self.breaker.allow())
+            self.assertFalse(self.breaker.allow())
+
+    def test_successful_probe_closes_circuit(self):
+        self.fail(2)
+
+        # No background task is involved, the next request is the probe
+        with patch("bill.breaker.time.time", return_value=time.time() + 31):
+            with patch.object(
+                self.client.session, "get", return_value=mock_response({})
+            ):
+                self.client.call("getBill", id=1)
+
+        self.assertFalse(self.breaker.is_open())
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens_circuit(self):
+        self.fail(2)
+
+        later = time.time() + 31
+        with patch("bill.breaker.time.time", return_value=later):
+            self.fail(1)
+            with self.assertRaises(CircuitOpen):
+                self.client.call("getBill", id=1)
+
+        with patch("bill.breaker.time.time", return_value=later + 31):
+            self.assertTrue(self.breaker.allow())
+
+    def test_serves_stale_payload_when_unavailable(self):
+        with patch.object(
+            self.client.session, "get", return_value=mock_response({"bill": {}})
+        ):
+            self.client.cached_call("getBill", id=1)
+        self.cache.backend.delete(self.cache.key("getBill", {"id": 1}))
+        self.fail(2)
+
+        payload = self.client.cached_call("getBill", id=1)
+
+        self.assertEqual(payload, {"bill": {}})
+        self.assertTrue(legiscan.served_stale.get())
+        legiscan.served_stale.set(False)
+
+    def test_stale_response_is_flagged(self):
+        def stale_fetch():
+            legiscan.served_stale.set(True)
+            return [{"session_id": 1}]
+
+        with patch("bill.views.fetch_session_list", side_effect=stale_fetch):
+            response = APIClient().get("/api/bill/search/session/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Legiscan-Stale"], "true")
@@ -0,0 +1,78 @@
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from bill.legiscan import LegiscanClient, LegiscanError
+from bill.stub import Cassette, LegiscanStub, make_stub_server
+
+CASSETTES = settings.BASE_DIR.parent / "sample_data" / "legiscan_stub"
+
+
+def serve(app):
+    """Serve app on a free port in the background, return its URL."""
+    server = make_stub_server(app)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/"
+
+
+class LegiscanStubTests(SimpleTestCase):
+    """Tests for the offline Legiscan stand-in."""
+
+    def start(self, **kwargs):
+        server, url = serve(LegiscanStub(Cassette(CASSETTES), **kwargs))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return LegiscanClient(api_key="test-key", base_url=url)
+
+    def test_replays_recorded_responses(self):
+        client = self.start()
+
+        bill = client.call("getBill", id=1900001)["bill"]
+        sessions = client.call("getSessionList", state="AR")["sessions"]
+        results = client.call("getSearch", state="AR", query="school")
+
+        self.assertEqual(bill["bill_number"], "HB1001")
+        self.assertEqual(sessions[0]["session_id"], 2000)
+        self.assertEqual(results["searchresult"]["summary"]["count"], 1)
+
+    def test_serves_any_bill_id(self):
+        client = self.start()
+
+        bill = client.call("getBill", id=42)["bill"]
+
+        self.assertEqual(bill["bill_id"], 42)
+
+    def test_unknown_op_is_a_legiscan_error(self):
+        client = self.start()
+
+        with self.assertRaisesMessage(LegiscanError, "No recorded response"):
+            client.call("getRollCall", id=1)
+
+    def test_injects_errors(self):
+        client = self.start(error_rate=1, error_status=500)
+
+        with self.assertRaisesMessage(LegiscanError, "status_code 500"):
+            client.call("getSessionList", state="AR")
+
+    def test_records_missing_responses(self):
+        upstream, upstream_url = serve(LegiscanStub(Cassette(CASSETTES)))
+        self.addCleanup(upstream.server_close)
+        self.addCleanup(upstream.shutdown)
+        path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, path)
+
+        recorder = LegiscanStub(Cassette(path), record_url=upstream_url)
+        server, url = serve(recorder)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        client = LegiscanClient(api_key="test-key", base_url=url)
+
+        client.call("getBill", id=1900002)
+
+        replay = Cassette(path).find("getBill", {"id": "1900002"}, fallback=False)
+        self.assertEqual(replay["bill"]["bill_number"], "SB2")
@@ -2,6 +2,7 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+
 from .views import (
     BillDetailView,
     UserKeywordViewSet,
@@ -13,6 +14,7 @@ from .views import (
     bills,
     sponsored_bills,
     text_search_bills,
+    local_search_bills,
     # tags - no legiscan api
     all_tags,
     search_by_tags,
@@ -22,7 +24,6 @@ from .views import (
     delete_bill_analysis,
 )
 
-
 user_keyword_router = DefaultRouter()
 
 user_keyword_router.register(r"keyword", UserKeywordViewSet, basename="user-keywords")
@@ -59,6 +60,7 @@ urlpatterns = [
     path("search/bill/", bills, name="search-bill"),
     path("search/sponsored-bills/", sponsored_bills, name="search-sponsored-bills"),
     path("search/text/", text_search_bills, name="search-text-bills"),
+    path("search/local/", local_search_bills, name="search-local-bills"),
     # user-interaction
     path(
         "user/interaction/",
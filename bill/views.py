@@ -1,8 +1,8 @@
 """Bill views."""
 
-import requests
-from django.conf import settings
+from django.db.models import Count, FilteredRelation, Q
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, parser_classes
 from rest_framework.permissions import (
@@ -14,7 +14,22 @@ from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 
 from .permissions import IsAdminUser
-from .models import Tag, Bill, UserBillInteraction, UserKeyword, BillAnalysis
+from .models import (
+    STANCE_CHOICES,
+    Tag,
+    Bill,
+    UserBillInteraction,
+    UserKeyword,
+    BillAnalysis,
+)
+from .etags import bill_etag, make_etag, master_list_etag, not_modified
+from .filters import (
+    filter_master_list,
+    master_list_bills,
+    master_list_page,
+    master_list_version,
+)
+from .pagination import keyset_page
 from .serializers import (
     UserBillInteractionSerializer,
     UserKeywordSerializer,
@@ -22,7 +37,19 @@ from .serializers import (
     AdminBillSerializer,
     BillAnalysisSerializer,
 )
-from .legiscan import text_search_session, text_search_state, fetch_bill
+from .services import mirror_is_synced, refresh_bill, schedule_bill_refresh
+from .search import text_search_local
+from .streaming import stream_format, streaming_response
+from .legiscan import (
+    process_bill_data,
+    text_search_session,
+    fetch_bill,
+    fetch_session_list,
+    fetch_session_people,
+    fetch_master_list,
+    fetch_sponsored_list,
+    search_many,
+)
 
 
 @api_view(["GET"])
@@ -33,8 +60,14 @@ def all_tags(request):
     Example: /api/bills/tags/
     {"tags": ["..."]}
     """
-    tags = Tag.objects.values_list("name", flat=True).distinct()
-    return Response({"tags": list(tags)})
+    tags = list(Tag.objects.values_list("name", flat=True).distinct())
+
+    etag = make_etag(tags)
+    response = not_modified(request, etag)
+    if response is None:
+        response = Response({"tags": tags})
+        response["ETag"] = etag
+    return response
 
 
 @api_view(["GET"])
@@ -42,28 +75,74 @@ def search_by_tags(request):
     """
     Filter bills based on multiple tags.
 
-    Example: /api/bill/filter-by-tags/?tags=healthcare,budget
+    Required Query Parameters:
+    - tags: Comma separated tag names
+
+    Optional Query Parameters:
+    - match: "all" to return bills having every tag (default), "any" for
+      bills having at least one
+    - page: The page number for pagination (default: 1)
+    - page_size: Results per page (default: 50, max: 200)
+
+    Example: /api/bill/search-by-tags/?tags=healthcare,budget&match=any
+
+    Response Format:
+    {
+        "summary": {"count": 120, "page": 1, "page_size": 50},
+        "bills": [{...}],
+    }
     """
     tag_names = request.query_params.get("tags", "")
 
     if not tag_names:
         return Response({"error": "No tags provided"}, status=400)
 
-    tag_list = [tag.strip() for tag in tag_names.split(",") if tag.strip()]
+    tag_list = {tag.strip() for tag in tag_names.split(",") if tag.strip()}
     if not tag_list:
         return Response({"error": "Invalid tag format"}, status=400)
 
-    # Fetch bills that have ALL the provided tags
-    bills = Bill.objects.filter(tags__name__in=tag_list).distinct()
+    match = request.query_params.get("match", "all")
+    if match not in ("all", "any"):
+        return Response({"error": 'match must be "all" or "any"'}, status=400)
 
-    if not bills.exists():
+    try:
+        page = max(int(request.query_params.get("page", 1)), 1)
+        page_size = min(max(int(request.query_params.get("page_size", 50)), 1), 200)
+    except ValueError:
+        return Response(
+            {"error": "page and page_size must be integers."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Match on the through table alone, grouped by bill
+    bill_ids = Bill.tags.through.objects.filter(tag__name__in=tag_list).values(
+        "bill_id"
+    )
+    if match == "all":
+        bill_ids = (
+            bill_ids.annotate(matched=Count("tag_id"))
+            .filter(matched=len(tag_list))
+            .values("bill_id")
+        )
+
+    bills = Bill.objects.filter(id__in=bill_ids).order_by("id")
+    count = bills.count()
+
+    if not count:
         return Response(
             {"message": "No bills found matching the given tags"},
             status=404,
         )
 
-    serializer = BillSerializer(bills, many=True)
-    return Response(serializer.data)
+    offset = (page - 1) * page_size
+    page_bills = bills.prefetch_related("tags")[offset : offset + page_size]
+
+    return Response(
+        {
+            "summary": {"count": count, "page": page, "page_size": page_size},
+            "bills": BillSerializer(page_bills, many=True).data,
+        }
+    )
 
 
 class BillDetailView(APIView):
@@ -75,9 +154,41 @@ class BillDetailView(APIView):
         """
         Retrieve bill details including LegiScan data, admin notes,
         and user interaction.
+
+        Bill data is served from the local mirror. Legiscan is only called
+        on a miss; stale bills are refreshed in the background.
         """
-        bill_data = fetch_bill(legiscan_bill_id)  # Fetch bill details from API
-        bill = Bill.objects.filter(legiscan_bill_id=legiscan_bill_id).first()
+        bills = Bill.objects.filter(legiscan_bill_id=legiscan_bill_id)
+
+        # Join the caller's interaction so everything comes in one query
+        if request.user.is_authenticated:
+            bills = bills.annotate(
+                user_interaction=FilteredRelation(
+                    "interactions",
+                    condition=Q(interactions__user=request.user),
+                )
+            ).select_related("user_interaction")
+
+        bill = bills.first()
+        etag = None
+
+        if bill and bill.legiscan_data:
+            schedule_bill_refresh(bill)
+
+            etag = bill_etag(bill)
+            response = not_modified(request, etag)
+            if response is not None:
+                patch_vary_headers(response, ["Authorization"])
+                return response
+
+            bill_data = process_bill_data(dict(bill.legiscan_data))
+        else:
+            # Mirror miss, fetch from API and store it
+            bill_data = refresh_bill(legiscan_bill_id, allow_stale=True)
+            if bill_data:
+                bill_data = process_bill_data(bill_data)
+            else:
+                bill_data = "bill fetch failed"
 
         # Admin details (if bill exists in DB)
         admin_info = {
@@ -90,20 +201,23 @@ class BillDetailView(APIView):
 
         # User interaction (if authenticated)
         user_interaction = None
-        if request.user.is_authenticated:
-            interaction = UserBillInteraction.objects.filter(
-                user=request.user, bill=bill
-            ).first()
-            if interaction:
-                user_interaction = UserBillInteractionSerializer(interaction).data
+        interaction = getattr(bill, "user_interaction", None)
+        if interaction:
+            interaction.bill = bill
+            user_interaction = UserBillInteractionSerializer(interaction).data
 
-        return Response(
+        response = Response(
             {
                 "bill_data": bill_data,  # Data from LegiScan API
                 "admin_info": admin_info,
                 "user_interaction": user_interaction,
             }
         )
+        if etag:
+            response["ETag"] = etag
+        # The interaction depends on the caller
+        patch_vary_headers(response, ["Authorization"])
+        return response
 
     def post(self, request, legiscan_bill_id):
         """Allow authenticated users to create or update their interaction with a bill."""
@@ -212,12 +326,11 @@ def sessions(request):
     """
     Fetches a list of all legislative sessions in Arkansas.
     """
-    url = f"https://api.legiscan.com/?key={settings.LEGISCAN_API_KEY}&op=getSessionList&state={settings.LEGISCAN_STATE}"
-    response = requests.get(url)
+    leg_response = fetch_session_list()
 
-    if response.status_code == 200:
-        return Response(response.json().get("sessions", []))
-    return Response({"error": "Failed to fetch session list"}, status=500)
+    if isinstance(leg_response, str):
+        return Response({"error": "Failed to fetch session list"}, status=500)
+    return Response(leg_response)
 
 
 @api_view(["GET"])
@@ -232,41 +345,76 @@ def sponsors(request):
     if not session_id:
         return Response({"error": "session_id is required"}, status=400)
 
-    url = f"https://api.legiscan.com/?key={settings.LEGISCAN_API_KEY}&op=getSessionPeople&id={session_id}"
-    response = requests.get(url)
+    leg_response = fetch_session_people(session_id)
 
-    if response.status_code == 200:
-        return Response(response.json().get("sessionpeople", []))
-    return Response({"error": "Failed to fetch session sponsors"}, status=500)
+    if isinstance(leg_response, str):
+        return Response({"error": "Failed to fetch session sponsors"}, status=500)
+    return Response(leg_response)
 
 
 @api_view(["GET"])
 def bills(request):
     """
-    Fetches a list of bills for a given session.
+    Fetches a page of bills for a given session, filtered server-side.
+
+    Required Query Parameters:
+    - session_id: The ID of the legislative session
+
+    Optional Query Parameters:
+    - chamber: "House" or "Senate"
+    - type: "Bill", "Resolution" or "Joint Resolution"
+    - bill_number: Full or partial bill number (e.g. "HB100", "200")
+    - status: Comma separated Legiscan status codes (e.g. "1,2")
+    - from_date, to_date: Inclusive last action date range (YYYY-MM-DD)
+    - page: The page number for pagination (default: 1)
+    - page_size: Results per page (default: 50, max: 200)
+    - stream: "json" or "ndjson" to stream every matching bill unpaginated,
+      see streaming.py
 
-    {"session": {...}, "bills": [{...}]}
+    {"session": {...}, "summary": {"count": 1200, "page": 1, "page_size": 50},
+     "bills": [{...}]}
     """
     session_id = request.query_params.get("session_id")
 
     if not session_id:
         return Response({"error": "session_id is required"}, status=400)
 
-    url = f"https://api.legiscan.com/?key={settings.LEGISCAN_API_KEY}&op=getMasterList&id={session_id}"
-    response = requests.get(url)
+    try:
+        fmt = stream_format(request.query_params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    if response.status_code == 200:
-        data = response.json().get("masterlist", {})
-        session_data = data.pop("session")
-        bills_dict_data = data
+    leg_response = fetch_master_list(session_id)
 
-        return Response(
-            {
-                "session": session_data,
-                "bills": map(lambda bd: bd[1], bills_dict_data.items()),
+    if isinstance(leg_response, str):
+        return Response({"error": "Failed to fetch bills"}, status=500)
+
+    version = master_list_version(leg_response)
+    etag = master_list_etag(version, request.query_params)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    try:
+        if not fmt:
+            response = Response(
+                master_list_page(leg_response, request.query_params, version)
+            )
+        else:
+            bills = filter_master_list(
+                master_list_bills(leg_response, request.query_params, version),
+                request.query_params,
+            )
+            envelope = {
+                "session": leg_response.get("session"),
+                "summary": {"count": len(bills)},
             }
-        )
-    return Response({"error": "Failed to fetch bills"}, status=500)
+            response = streaming_response(fmt, envelope, "bills", bills)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response["ETag"] = etag
+    return response
 
 
 @api_view(["GET"])
@@ -277,6 +425,9 @@ def sponsored_bills(request):
     Expected Query Parameter:
     - people_id: The ID of the sponsor (required)
 
+    Optional Query Parameters:
+    - stream: "json" or "ndjson" to stream the response, see streaming.py
+
     Example response from LegiScan:
     { "sponsor": {...}, "sessions": [{...}], "bills": [{...}]}
     """
@@ -285,19 +436,22 @@ def sponsored_bills(request):
     if not people_id:
         return Response({"error": "people_id is required"}, status=400)
 
-    url = f"https://api.legiscan.com/?key={settings.LEGISCAN_API_KEY}&op=getSponsoredList&id={people_id}"
-    response = requests.get(url)
+    try:
+        fmt = stream_format(request.query_params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    if response.status_code == 200:
-        data = response.json().get("sponsoredbills", {})
-        return Response(
-            {
-                "sponsor": data.get("sponsor"),
-                "sessions": data.get("sessions"),
-                "bills": data.get("bills"),
-            }
-        )
-    return Response({"error": "Failed to fetch sponsored bills"}, status=500)
+    leg_response = fetch_sponsored_list(people_id)
+
+    if isinstance(leg_response, str):
+        return Response({"error": "Failed to fetch sponsored bills"}, status=500)
+
+    data = leg_response
+    envelope = {"sponsor": data.get("sponsor"), "sessions": data.get("sessions")}
+
+    if fmt:
+        return streaming_response(fmt, envelope, "bills", data.get("bills") or [])
+    return Response({**envelope, "bills": data.get("bills")})
 
 
 @api_view(["GET"])
@@ -311,6 +465,7 @@ def text_search_bills(request):
 
     Optional Query Parameters:
     - page: The page number for pagination (default: 1)
+    - stream: "json" or "ndjson" to stream the response, see streaming.py
 
     Example Request:
     GET /api/bills/search/?session_id=1234&query=education&page=2
@@ -331,10 +486,15 @@ def text_search_bills(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    try:
+        fmt = stream_format(request.query_params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     leg_response = text_search_session(session_id, query, page)
 
     if isinstance(leg_response, str):
-        Response(
+        return Response(
             {"error": "Failed to fetch search results"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
@@ -342,16 +502,73 @@ def text_search_bills(request):
     data = leg_response
     summary = data.pop("summary")
 
+    if fmt:
+        return streaming_response(fmt, {"summary": summary}, "bills", data.values())
+    return Response({"summary": summary, "bills": list(data.values())})
+
+
+@api_view(["GET"])
+def local_search_bills(request):
+    """
+    Full-text search over locally mirrored bills.
+
+    Matches bill number, title and description without calling LegiScan.
+
+    Required Query Parameters:
+    - query: The search term
+
+    Optional Query Parameters:
+    - page: The page number for pagination (default: 1)
+    - page_size: Results per page (default: 50, max: 200)
+
+    Response Format:
+    {
+        "summary": {"count": 120, "page": 1, "page_size": 50},
+        "bills": [{...}],
+    }
+    """
+    query = request.query_params.get("query")
+
+    if not query:
+        return Response(
+            {"error": "query is required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        page = max(int(request.query_params.get("page", 1)), 1)
+        page_size = min(max(int(request.query_params.get("page_size", 50)), 1), 200)
+    except ValueError:
+        return Response(
+            {"error": "page and page_size must be integers."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    count, results = text_search_local(query, page=page, page_size=page_size)
+
     return Response(
         {
-            "summary": summary,
-            "bills": map(lambda bd: bd[1], data.items()),
+            "summary": {"count": count, "page": page, "page_size": page_size},
+            "bills": results,
         }
     )
 
 
 # interactions & keywords
 
+# Columns UserBillInteractionSerializer reads, plus the keyset
+INTERACTION_LIST_FIELDS = [
+    "id",
+    "modified",
+    "stance",
+    "note",
+    "ignore",
+    "is_archived",
+    "bill__legiscan_bill_id",
+    "bill__bill_number",
+    "bill__bill_title",
+]
+
 
 class UserBillInteractionViewSet(viewsets.ViewSet):
     """
@@ -381,12 +598,60 @@ class UserBillInteractionViewSet(viewsets.ViewSet):
         return Response(UserBillInteractionSerializer(interaction).data)
 
     def list(self, request):
-        """Handles GET: List all interactions for the authenticated user."""
-        interactions = UserBillInteraction.objects.filter(user=request.user).order_by(
-            "-modified"
+        """
+        Handles GET: List the authenticated user's interactions, newest first.
+
+        Optional Query Parameters:
+        - is_archived, ignore: true or false
+        - stance: support, oppose or watch
+        - cursor: The `next` cursor of the previous page
+        - page_size: Results per page (default: 50, max: 200)
+
+        Response Format:
+        {
+            "next": "<cursor>" or null,
+            "results": [{...}],
+        }
+        """
+        interactions = (
+            UserBillInteraction.objects.filter(user=request.user)
+            .select_related("bill")
+            .only(*INTERACTION_LIST_FIELDS)
         )
-        serializer = UserBillInteractionSerializer(interactions, many=True)
-        return Response(serializer.data)
+
+        for field in ("is_archived", "ignore"):
+            value = request.query_params.get(field)
+            if value is None:
+                continue
+            if value.lower() not in ("true", "false"):
+                return Response(
+                    {"error": f"{field} must be true or false."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            interactions = interactions.filter(**{field: value.lower() == "true"})
+
+        stance = request.query_params.get("stance")
+        if stance is not None:
+            if stance not in dict(STANCE_CHOICES):
+                return Response(
+                    {"error": "stance must be support, oppose or watch."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            interactions = interactions.filter(stance=stance)
+
+        try:
+            page_size = min(max(int(request.query_params.get("page_size", 50)), 1), 200)
+            page, next_cursor = keyset_page(
+                interactions, request.query_params.get("cursor"), page_size
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid cursor or page_size."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = UserBillInteractionSerializer(page, many=True)
+        return Response({"next": next_cursor, "results": serializer.data})
 
     def destroy(self, request, legiscan_bill_id=None):
         """Handles DELETE: Deletes a user's interaction with a bill."""
@@ -515,13 +780,15 @@ class UserKeywordViewSet(viewsets.ModelViewSet):
         """Returns a list of bills that match the user's saved keywords."""
 
         user_keywords = self.get_queryset()
-        matched_bills = {}
+        keywords = [entry.keyword.lower() for entry in user_keywords]
+
+        if mirror_is_synced():
+            results = {keyword: text_search_local(keyword)[1] for keyword in keywords}
+        else:
+            # No local mirror yet, search Legiscan concurrently
+            results = search_many(keywords)
 
-        for entry in user_keywords:
-            keyword = entry.keyword.lower()
-            bills = text_search_state(keyword)[1:]  # Skip summary result
-            if bills:
-                matched_bills[keyword] = bills
+        matched_bills = {keyword: bills for keyword, bills in results.items() if bills}
 
         return Response(matched_bills)
 
@@ -0,0 +1,379 @@
+"""
+Benchmarks for the bill API hot paths.
+
+Seeds synthetic bills, users, interactions, tags and keywords, then
+times each hot path at every scale. Legiscan calls go to the offline
+stub (bill.stub), so results do not depend on the network. Run it with
+the `benchmark` management command, which uses a throwaway database.
+"""
+
+import platform
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import Callable, Iterable, Optional
+from unittest.mock import patch
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bill import legiscan
+from bill.emails import format_email_digest
+from bill.filters import (
+    BillNumberIndex,
+    filter_by_chamber,
+    filter_by_type,
+    search_by_bill_number,
+)
+from bill.legiscan import LegiscanClient, RateLimiter, text_search_state_no_summary
+from bill.models import Bill, Tag, UserBillInteraction, UserKeyword
+from bill.services import upsert_bills
+from bill.stub import Cassette, LegiscanStub, make_stub_server
+from bill.tasks import bills_for_user_keywords
+
+User = get_user_model()
+
+CASSETTES = settings.BASE_DIR.parent / "sample_data" / "legiscan_stub"
+
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+DEFAULT_USERS = 10_000
+
+# Words bill titles and user keywords are drawn from, so keywords match
+VOCABULARY = (
+    "school funding broadband rural healthcare tax income property water "
+    "highway medicaid pension police fire election voter firearm hunting "
+    "fishing agriculture farm timber energy solar oil gas prison court judge "
+    "child welfare adoption housing insurance pharmacy hospital nurse teacher "
+    "university tuition lottery alcohol tobacco cannabis veteran military"
+).split()
+BILL_PREFIXES = ("HB", "SB", "HR", "SR", "HJR", "SJR")
+TAGS = [f"tag-{i}" for i in range(50)]
+INTERACTIONS_PER_USER = 10
+# The benchmarked user has many interactions, like an active lobbyist
+HEAVY_USER_INTERACTIONS = 500
+KEYWORDS_PER_USER = 3
+
+
+def synthetic_bill(rng: random.Random, bill_id: int) -> dict:
+    """Build a getBill payload for a synthetic bill."""
+    prefix = rng.choice(BILL_PREFIXES)
+    words = rng.sample(VOCABULARY, 6)
+    return {
+        "bill_id": bill_id,
+        "change_hash": f"{bill_id:032x}",
+        "session_id": 2000,
+        "bill_number": f"{prefix}{bill_id}",
+        "title": " ".join(words[:4]).title(),
+        "description": f"An act concerning {' and '.join(words)}.",
+        "status": rng.randint(1, 4),
+        "status_date": "2025-01-13",
+        "url": f"https://legiscan.com/AR/bill/{prefix}{bill_id}/2025",
+        "state_link": "https://arkleg.state.ar.us/",
+        "history": [{"date": "2025-01-14", "action": "Filed"}],
+    }
+
+
+class Dataset:
+    """
+    Synthetic data grown scale by scale.
+
+    Bills are only ever added, so running the scales in increasing
+    order seeds each bill once.
+    """
+
+    def __init__(self, users: int, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.user_count = users
+        self.bill_count = 0
+        self.users: list = []
+        self.heavy_user = None
+
+    def seed_users(self) -> None:
+        """Create users, their keywords and the tags."""
+        self.users = User.objects.bulk_create(
+            (
+                User(email=f"bench-{i}@example.com", password="!")
+                for i in range(self.user_count)
+            ),
+            batch_size=1000,
+        )
+        self.heavy_user = self.users[0]
+
+        UserKeyword.objects.bulk_create(
+            (
+                UserKeyword(user=user, keyword=keyword)
+                for user in self.users
+                for keyword in self.rng.sample(VOCABULARY, KEYWORDS_PER_USER)
+            ),
+            batch_size=1000,
+        )
+        Tag.objects.bulk_create(Tag(name=name) for name in TAGS)
+
+    def grow(self, scale: int) -> None:
+        """
+        Add bills and their tags up to scale bills.
+
+        Interactions are only added with the first bills, so that each
+        scale measures the same users against more bills.
+        """
+        start, self.bill_count = self.bill_count, scale
+        if scale <= start:
+            return
+
+        upsert_bills(
+            synthetic_bill(self.rng, bill_id) for bill_id in range(start, scale)
+        )
+        bills = list(
+            Bill.objects.filter(
+                legiscan_bill_id__in=[str(i) for i in range(start, scale)]
+            ).values_list("id", flat=True)
+        )
+
+        tags = list(Tag.objects.values_list("id", flat=True))
+        Through = Bill.tags.through
+        Through.objects.bulk_create(
+            (
+                Through(bill_id=bill_id, tag_id=tag_id)
+                for bill_id in bills
+                for tag_id in self.rng.sample(tags, self.rng.randint(0, 3))
+            ),
+            batch_size=1000,
+        )
+
+        if start == 0:
+            self.seed_interactions(bills)
+
+    def seed_interactions(self, bills: list) -> None:
+        interactions = [
+            UserBillInteraction(
+                user=user,
+                bill_id=bill_id,
+                stance=self.rng.choice(["support", "oppose", "watch"]),
+                ignore=self.rng.random() < 0.05,
+            )
+            for user in self.users[1:]
+            for bill_id in self.rng.sample(
+                bills, min(INTERACTIONS_PER_USER, len(bills))
+            )
+        ]
+        interactions += [
+            UserBillInteraction(user=self.heavy_user, bill_id=bill_id)
+            for bill_id in self.rng.sample(
+                bills, min(HEAVY_USER_INTERACTIONS, len(bills))
+            )
+        ]
+        UserBillInteraction.objects.bulk_create(interactions, batch_size=1000)
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting queries.
+
+    Unlike CaptureQueriesContext it is not reset by request_started, so
+    it also counts the queries of requests made with the test client.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(
+    name: str,
+    scale: int,
+    func: Callable,
+    runs: int,
+    setup: Optional[Callable] = None,
+) -> dict:
+    """
+    Time func over runs, after one warm-up run that counts queries.
+
+    setup, if given, runs untimed before every call.
+    """
+    setup = setup or (lambda: None)
+
+    setup()
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        func()
+
+    timings = []
+    for _ in range(runs):
+        setup()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "name": name,
+        "scale": scale,
+        "runs": runs,
+        "queries": queries.count,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+
+def skipped(name: str, scale: int, reason: str) -> dict:
+    return {"name": name, "scale": scale, "skipped": reason}
+
+
+def clear_legiscan_cache():
+    caches[settings.LEGISCAN_CACHE_ALIAS].clear()
+
+
+def cases(dataset: Dataset) -> Iterable[tuple[str, Callable, Optional[Callable]]]:
+    """(name, callable, setup) for every benchmarked hot path."""
+    rng = random.Random(1)
+    client = APIClient()
+    client.force_authenticate(user=dataset.heavy_user)
+    bill_dicts = list(Bill.objects.values("bill_number"))
+    bill_index = BillNumberIndex(bill_dicts)
+
+    # Tag pairs some bill carries, so that every search finds bills
+    tags_by_bill = defaultdict(list)
+    tagged = Bill.tags.through.objects.values_list("bill_id", "tag__name")
+    for bill_id, name in tagged.iterator(chunk_size=10_000):
+        tags_by_bill[bill_id].append(name)
+    tag_pairs = [names[:2] for names in tags_by_bill.values() if len(names) > 1]
+
+    def bill_detail():
+        bill_id = rng.randrange(dataset.bill_count)
+        response = client.get(f"/api/bill/{bill_id}/")
+        assert response.status_code == 200, response.status_code
+
+    def interactions_list():
+        response = client.get("/api/bill/user/interaction/")
+        assert response.status_code == 200, response.status_code
+
+    def tags_search():
+        tags = ",".join(rng.choice(tag_pairs))
+        response = client.get(f"/api/bill/search-by-tags/?tags={tags}")
+        assert response.status_code == 200, response.status_code
+
+    def digest_local():
+        bills_for_user_keywords(bills=Bill.objects.all())
+
+    def digest_legiscan():
+        bills_for_user_keywords(text_search_state_no_summary)
+
+    yield "BillDetailView.get", bill_detail, None
+    yield "UserBillInteractionViewSet.list", interactions_list, None
+    yield "search_by_tags", tags_search, None
+    yield "filters.filter_by_chamber", lambda: filter_by_chamber(
+        "House", bill_dicts
+    ), None
+    yield "filters.filter_by_type", lambda: filter_by_type("Bill", bill_dicts), None
+    yield "filters.search_by_bill_number", lambda: search_by_bill_number(
+        "HB1", bill_dicts
+    ), None
+    yield "filters.BillNumberIndex", lambda: BillNumberIndex(bill_dicts), None
+    yield "filters.search_by_bill_number.indexed", lambda: search_by_bill_number(
+        "HB1", bill_index
+    ), None
+    yield "bills_for_user_keywords.local", digest_local, None
+    # Every run searches Legiscan (the stub) instead of the response cache
+    yield "bills_for_user_keywords.legiscan", digest_legiscan, clear_legiscan_cache
+
+
+def run_benchmarks(
+    scales: Iterable[int] = DEFAULT_SCALES,
+    users: int = DEFAULT_USERS,
+    runs: int = 10,
+    latency: float = 0,
+    log: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """
+    Seed and benchmark every scale, returning JSON-serializable results.
+
+    Legiscan is served by the stub with `latency` seconds per request.
+    """
+    log = log or (lambda message: None)
+    results = []
+
+    server = make_stub_server(LegiscanStub(Cassette(CASSETTES), latency=latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+
+    with ExitStack() as stack:
+        stack.callback(server.server_close)
+        stack.callback(server.shutdown)
+        stack.enter_context(
+            override_settings(
+                LEGISCAN_BASE_URL=f"http://{host}:{port}/",
+                LEGISCAN_MONTHLY_QUOTA=0,
+                LEGISCAN_RATE_LIMIT=0,
+            )
+        )
+        client = LegiscanClient.from_settings()
+        # Usage is recorded from the search threads, which would lock a
+        # SQLite test database; the quota is not what is measured here.
+        client.quota = None
+        stack.enter_context(patch.object(legiscan, "_client", client))
+        stack.enter_context(patch.object(legiscan, "_search_limiter", RateLimiter(0)))
+        # Stale bills are not refreshed in the background
+        stack.enter_context(patch("bill.services.async_task"))
+
+        dataset = Dataset(users)
+        log(f"Seeding {users} users")
+        dataset.seed_users()
+
+        for scale in sorted(scales):
+            log(f"Seeding {scale} bills")
+            dataset.grow(scale)
+
+            for name, func, setup in cases(dataset):
+                caches["default"].clear()
+                clear_legiscan_cache()
+                log(f"  {name}")
+                results.append(measure(name, scale, func, runs, setup))
+
+            results.append(benchmark_digest_email(dataset, scale, runs))
+
+    return {
+        "meta": {
+            "timestamp": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "users": users,
+            "runs": runs,
+            "legiscan_latency": latency,
+        },
+        "results": results,
+    }
+
+
+def benchmark_digest_email(dataset: Dataset, scale: int, runs: int) -> dict:
+    """Time rendering a digest for the user with the most matches."""
+    name = "format_email_digest"
+    digests = bills_for_user_keywords(bills=Bill.objects.all())
+    if not digests:
+        return skipped(name, scale, "no digests")
+
+    user, keyword_dict = max(
+        digests.items(), key=lambda item: sum(map(len, item[1].values()))
+    )
+    try:
+        format_email_digest(user, keyword_dict)
+    except Exception as e:
+        # Rendering needs an MJML backend (MJML_BACKEND_MODE)
+        return skipped(name, scale, f"MJML rendering failed: {e}")
+
+    return measure(name, scale, lambda: format_email_digest(user, keyword_dict), runs)
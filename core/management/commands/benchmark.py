@@ -0,0 +1,66 @@
+"""
+Django command to benchmark the bill API hot paths
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark import DEFAULT_SCALES, DEFAULT_USERS, run_benchmarks
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the bill API against synthetic data"""
+
+    help = (
+        "Benchmark the bill API hot paths at several data scales and print "
+        "the results as JSON. Runs in a throwaway test database against the "
+        "offline LegiScan stub."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            type=int,
+            nargs="+",
+            default=list(DEFAULT_SCALES),
+            help="Numbers of bills to benchmark with.",
+        )
+        parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+        parser.add_argument("--runs", type=int, default=10)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0,
+            help="Seconds the LegiScan stub adds to every request.",
+        )
+        parser.add_argument("--output", help="Write results to this file.")
+
+    def handle(self, *args, **options):
+        """Entry point for command"""
+        if options["runs"] < 1 or options["users"] < 1:
+            raise CommandError("--runs and --users must be positive.")
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_benchmarks(
+                scales=options["scales"],
+                users=options["users"],
+                runs=options["runs"],
+                latency=options["latency"],
+                log=self.stderr.write,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,103 @@
+"""
+Django command to bulk import a LegiScan session dataset
+"""
+
+import base64
+import io
+import json
+import time
+import zipfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bill.legiscan import OP_DATASET, OP_DATASET_LIST, LegiscanError, get_client
+from bill.models import AppSettings
+from bill.services import upsert_bills
+
+
+def iter_dataset_bills(archive):
+    """Yield getBill payloads from a dataset ZIP without extracting it."""
+    with zipfile.ZipFile(archive) as zf:
+        for name in zf.namelist():
+            if "/bill/" not in name or not name.endswith(".json"):
+                continue
+            with zf.open(name) as member:
+                yield json.load(member)["bill"]
+
+
+class Command(BaseCommand):
+    """Django command to load a LegiScan dataset ZIP into the bill mirror"""
+
+    help = (
+        "Import a LegiScan dataset ZIP into the bill mirror, "
+        "either from a local file or downloaded with getDataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Path to a local dataset ZIP.")
+        parser.add_argument(
+            "--session-id",
+            help="Session to download (defaults to the current session).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        """Entry point for command"""
+        if options["file"]:
+            try:
+                archive = open(options["file"], "rb")
+            except OSError as e:
+                raise CommandError(f"Cannot open dataset: {e}")
+        else:
+            archive = self.download(options["session_id"])
+
+        start = time.perf_counter()
+        try:
+            # A back-fill, not news for the keyword digest
+            rows = upsert_bills(
+                iter_dataset_bills(archive),
+                batch_size=options["batch_size"],
+                mark_changed=False,
+            )
+        except zipfile.BadZipFile as e:
+            raise CommandError(f"Invalid dataset archive: {e}")
+        finally:
+            archive.close()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {rows} bills in {elapsed:.2f}s "
+                f"({rows / elapsed if elapsed else 0:.0f} rows/sec)"
+            )
+        )
+
+    def download(self, session_id):
+        """Download a session dataset ZIP with getDatasetList/getDataset."""
+        if not session_id:
+            app_settings = AppSettings.objects.filter(id=1).first()
+            session_id = app_settings and app_settings.current_session_id
+        if not session_id:
+            raise CommandError("No --session-id given and no current session set.")
+
+        client = get_client()
+        self.stdout.write(f"Downloading dataset for session {session_id}...")
+        try:
+            datasets = client.call(OP_DATASET_LIST, state=settings.LEGISCAN_STATE).get(
+                "datasetlist", []
+            )
+            dataset = next(
+                (d for d in datasets if str(d["session_id"]) == str(session_id)),
+                None,
+            )
+            if dataset is None:
+                raise CommandError(f"No dataset found for session {session_id}.")
+
+            payload = client.call(
+                OP_DATASET, id=session_id, access_key=dataset["access_key"]
+            )
+        except LegiscanError as e:
+            raise CommandError(f"Dataset download failed: {e}")
+
+        return io.BytesIO(base64.b64decode(payload["dataset"]["zip"]))
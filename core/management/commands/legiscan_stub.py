@@ -0,0 +1,76 @@
+"""
+Django command to run an offline LegiScan stand-in
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bill.legiscan import BASE_URL
+from bill.stub import Cassette, LegiscanStub, make_stub_server
+
+
+class Command(BaseCommand):
+    """Django command to serve recorded LegiScan responses over HTTP"""
+
+    help = (
+        "Serve recorded LegiScan responses for offline runs and load tests. "
+        "Set LEGISCAN_BASE_URL to the printed URL to use it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--cassettes",
+            default=str(settings.BASE_DIR.parent / "sample_data" / "legiscan_stub"),
+            help="Directory of recorded responses, one <op>.json per operation.",
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0, help="Seconds added to every request."
+        )
+        parser.add_argument(
+            "--jitter", type=float, default=0, help="Extra random delay, in seconds."
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0,
+            help="Fraction of requests (0-1) answered with --error-status.",
+        )
+        parser.add_argument("--error-status", type=int, default=503)
+        parser.add_argument(
+            "--record",
+            action="store_true",
+            help="Forward unrecorded requests to LegiScan and record them.",
+        )
+        parser.add_argument("--seed", type=int, help="Seed for injected errors.")
+
+    def handle(self, *args, **options):
+        """Entry point for command"""
+        if not 0 <= options["error_rate"] <= 1:
+            raise CommandError("--error-rate must be between 0 and 1.")
+        if options["record"] and not settings.LEGISCAN_API_KEY:
+            raise CommandError("--record needs LEGISCAN_API_KEY.")
+
+        app = LegiscanStub(
+            Cassette(options["cassettes"]),
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            record_url=BASE_URL if options["record"] else None,
+            api_key=settings.LEGISCAN_API_KEY,
+            seed=options["seed"],
+        )
+        server = make_stub_server(app, options["host"], options["port"])
+        host, port = server.server_address[:2]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Serving LegiScan stub on http://{host}:{port}/")
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -2,13 +2,21 @@
 Test custom Django management commands.
 """
 
+from io import StringIO
 from unittest.mock import patch
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
 from psycopg2 import OperationalError as Psycopg2Error
 
+from bill.models import Bill, UserKeyword
+from bill.tasks import bills_for_user_keywords
+from core.benchmark import run_benchmarks
+
 
 @patch("core.management.commands.wait_for_db.Command.check")
 class CommandsTestCase(SimpleTestCase):
@@ -33,3 +41,76 @@ class CommandsTestCase(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class ImportLegiscanDatasetTestCase(TestCase):
+    """Test import_legiscan_dataset command."""
+
+    sample_archive = (
+        settings.BASE_DIR.parent / "sample_data/legiscan_dataset_AR_2000.zip"
+    )
+
+    def test_import_from_local_file(self):
+        """Test importing the sample dataset offline."""
+        out = StringIO()
+
+        call_command("import_legiscan_dataset", file=self.sample_archive, stdout=out)
+
+        self.assertEqual(Bill.objects.count(), 4)
+        self.assertIn("Imported 4 bills", out.getvalue())
+        bill = Bill.objects.get(bill_number="SB2")
+        self.assertEqual(bill.last_action, "Passed Senate")
+
+    def test_import_is_idempotent(self):
+        """Test re-importing updates existing bills instead of duplicating."""
+        Bill.objects.create(legiscan_bill_id="1900001", admin_note="Keep me")
+
+        call_command(
+            "import_legiscan_dataset", file=self.sample_archive, stdout=StringIO()
+        )
+        call_command(
+            "import_legiscan_dataset", file=self.sample_archive, stdout=StringIO()
+        )
+
+        self.assertEqual(Bill.objects.count(), 4)
+        self.assertEqual(
+            Bill.objects.get(legiscan_bill_id="1900001").admin_note, "Keep me"
+        )
+
+    def test_import_is_not_sent_in_digest(self):
+        """Test imported bills are not announced as changes."""
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="pw"
+        )
+        call_command(
+            "import_legiscan_dataset", file=self.sample_archive, stdout=StringIO()
+        )
+        bill = Bill.objects.get(bill_number="SB2")
+        UserKeyword.objects.create(user=user, keyword=bill.bill_title.split()[0])
+
+        self.assertIn(user, bills_for_user_keywords(bills=Bill.objects.all()))
+        self.assertEqual(bills_for_user_keywords(), {})
+
+    def test_import_missing_file(self):
+        """Test a missing archive raises a CommandError."""
+        with self.assertRaises(CommandError):
+            call_command("import_legiscan_dataset", file="missing.zip")
+
+
+class BenchmarkTestCase(TestCase):
+    """Test the benchmark suite."""
+
+    def test_run_benchmarks_small_scale(self):
+        """Test every hot path is benchmarked at every scale."""
+        results = run_benchmarks(scales=[30, 20], users=5, runs=1)
+
+        self.assertEqual(results["meta"]["users"], 5)
+        by_scale = {}
+        for result in results["results"]:
+            by_scale.setdefault(result["scale"], set()).add(result["name"])
+        self.assertEqual(list(by_scale), [20, 30])
+        for names in by_scale.values():
+            self.assertIn("BillDetailView.get", names)
+            self.assertIn("bills_for_user_keywords.legiscan", names)
+            self.assertIn("format_email_digest", names)
+        self.assertEqual(Bill.objects.count(), 30)
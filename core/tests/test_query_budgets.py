@@ -0,0 +1,279 @@
+"""
+Query budgets for every API endpoint.
+
+Each endpoint is called with a small and a large dataset. The number of
+SQL queries must stay within the endpoint's budget and must not grow
+with the data, which catches N+1 queries before they reach production.
+"""
+
+import threading
+from typing import NamedTuple, Optional
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+from rest_framework.routers import APIRootView
+from rest_framework.test import APIClient
+
+from ads.models import Ad
+from authentication.backends import get_token_user
+from bill import legiscan
+from bill.legiscan import LegiscanClient
+from bill.models import (
+    AppSettings,
+    Bill,
+    BillAnalysis,
+    Tag,
+    UserBillInteraction,
+    UserKeyword,
+)
+from bill.services import upsert_bills
+from bill.stub import Cassette, LegiscanStub, make_stub_server
+from bill.tests.test_bill_sync import legiscan_bill
+from user.roles import user_roles
+
+User = get_user_model()
+
+CASSETTES = settings.BASE_DIR.parent / "sample_data" / "legiscan_stub"
+
+# URL prefixes whose routes must all have a budget
+BUDGETED_PREFIXES = ("api/bill/", "api/ads/", "api/user/")
+
+SMALL, LARGE = 1, 30
+TAGS = ["budget", "education"]
+# Keyword matching costs a search per keyword, so their number is fixed
+KEYWORDS = ["bill", "act", "school"]
+
+
+class Case(NamedTuple):
+    """An API call and the most queries it may make."""
+
+    method: str
+    path: str
+    budget: int
+    data: Optional[dict] = None
+    client: str = "user"
+    format: str = "json"
+
+
+def is_api_root(callback) -> bool:
+    view_class = getattr(callback, "cls", None)
+    return isinstance(view_class, type) and issubclass(view_class, APIRootView)
+
+
+def api_routes() -> set:
+    """Routes of every budgeted endpoint, as reported by ResolverMatch.route."""
+    routes = set()
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            route = str(pattern.pattern)
+            if prefix and route.startswith("^"):
+                route = route[1:]
+            route = prefix + route
+
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, route)
+            elif "(?P<format>" in route or "<drf_format_suffix:format>" in route:
+                # Format suffix variants share their view with the base route
+                continue
+            elif is_api_root(pattern.callback):
+                # DefaultRouter's browsable index; at api/ads/ the list
+                # route shadows it, so it is not reachable to budget
+                continue
+            else:
+                routes.add(route)
+
+    walk(get_resolver().url_patterns, "")
+    return {route for route in routes if route.startswith(BUDGETED_PREFIXES)}
+
+
+class QueryBudgetTests(TestCase):
+    """Every endpoint runs within a fixed query budget."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="user@example.com", password="pw")
+        cls.admin = User.objects.create_user(email="admin@example.com", password="pw")
+        cls.admin.groups.add(Group.objects.create(name="admin"))
+        cls.token = Token.objects.create(user=cls.user)
+        cls.tags = [Tag.objects.create(name=name) for name in TAGS]
+        cls.keywords = [
+            UserKeyword.objects.create(user=cls.user, keyword=keyword)
+            for keyword in KEYWORDS
+        ]
+        # Search the seeded mirror rather than Legiscan
+        AppSettings.objects.create(
+            id=1,
+            current_session_id="2000",
+            mirror_session_id="2000",
+            mirror_synced_at=now(),
+        )
+
+    def setUp(self):
+        cache.clear()
+        server = make_stub_server(LegiscanStub(Cassette(CASSETTES)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+
+        client = LegiscanClient(api_key="test-key", base_url=f"http://{host}:{port}/")
+        for patcher in (
+            patch.object(legiscan, "_client", client),
+            patch("bill.services.async_task"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.clients = {"anonymous": APIClient(), "user": APIClient()}
+        self.clients["user"].force_authenticate(user=self.user)
+        self.clients["admin"] = APIClient()
+        self.clients["admin"].force_authenticate(user=self.admin)
+        # Authenticates through CachedTokenAuthentication
+        self.clients["token"] = APIClient()
+        self.clients["token"].credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+        self.bill_count = 0
+
+    def seed(self, size: int) -> None:
+        """Grow the bills, interactions, analyses and ads to size rows each."""
+        ids = range(self.bill_count + 1, size + 1)
+        self.bill_count = size
+
+        upsert_bills(legiscan_bill(i, f"hash{i}") for i in ids)
+        bills = Bill.objects.filter(legiscan_bill_id__in=[str(i) for i in ids])
+        for bill in bills:
+            bill.tags.set(self.tags)
+            UserBillInteraction.objects.create(user=self.user, bill=bill)
+            BillAnalysis.objects.create(bill=bill, file="bill_analyses/a.pdf")
+            Ad.objects.create(title="Ad", image="ads/ad.png", link="https://a.com")
+
+        self.bill = Bill.objects.get(legiscan_bill_id="1")
+        self.analysis = BillAnalysis.objects.filter(bill=self.bill).first()
+        self.ad = Ad.objects.first()
+
+    def cases(self) -> list:
+        bill = "/api/bill"
+        keyword = self.keywords[0].id
+        search = "session_id=2000&query=school"
+        interaction = {"stance": "support", "note": "Note", "ignore": False}
+        ad = {"title": "New", "image": "ads/new.png", "link": "https://a.com"}
+        upload = {"file": SimpleUploadedFile("a.txt", b"a"), "description": "A"}
+
+        return [
+            # bill
+            Case("GET", f"{bill}/tags/", 1),
+            Case("GET", f"{bill}/search-by-tags/?tags=budget,education", 3),
+            Case("GET", f"{bill}/1/", 1),
+            Case("GET", f"{bill}/1/", 1, client="anonymous"),
+            Case("POST", f"{bill}/1/", 6, data=interaction),
+            Case("PATCH", f"{bill}/1/", 4, data={"note": "Changed"}),
+            Case("DELETE", f"{bill}/1/", 5),
+            Case("GET", f"{bill}/search/session/", 0),
+            Case("GET", f"{bill}/search/sponsor/?session_id=2000", 0),
+            Case("GET", f"{bill}/search/bill/?session_id=2000", 0),
+            Case("GET", f"{bill}/search/sponsored-bills/?people_id=1", 0),
+            Case("GET", f"{bill}/search/text/?{search}", 0),
+            Case("GET", f"{bill}/search/local/?query=bill", 2),
+            Case("GET", f"{bill}/1/", 1, client="token"),
+            Case("GET", f"{bill}/analysis/1/", 1),
+            Case("POST", f"{bill}/analysis/1/upload/", 1, upload, format="multipart"),
+            Case("POST", f"{bill}/analysis/{self.analysis.id}/delete/", 4),
+            Case("GET", f"{bill}/user/", 0),
+            Case("GET", f"{bill}/user/keyword/", 1),
+            Case("POST", f"{bill}/user/keyword/", 2, data={"keyword": "new"}),
+            Case("GET", f"{bill}/user/keyword/{keyword}/", 1),
+            Case("PATCH", f"{bill}/user/keyword/{keyword}/", 3, {"keyword": "x"}),
+            Case("DELETE", f"{bill}/user/keyword/{keyword}/", 5),
+            Case(
+                "DELETE",
+                f"{bill}/user/keyword/bulk_delete/",
+                4,
+                data={"keyword_ids": [keyword]},
+            ),
+            Case(
+                "GET",
+                f"{bill}/user/keyword/matching-bills/",
+                2 + 2 * len(KEYWORDS),
+            ),
+            Case("GET", f"{bill}/user/interaction/", 1),
+            Case("GET", f"{bill}/user/interaction/1/", 3),
+            Case("POST", f"{bill}/user/interaction/1/", 6, data=interaction),
+            Case("PATCH", f"{bill}/user/interaction/1/", 6, data=interaction),
+            Case("DELETE", f"{bill}/user/interaction/1/", 5),
+            Case("GET", f"{bill}/admin/1/", 2, client="admin"),
+            Case(
+                "POST",
+                f"{bill}/admin/1/",
+                9,
+                data={"admin_note": "Note", "tag_names": TAGS},
+                client="admin",
+            ),
+            Case("PATCH", f"{bill}/admin/1/", 9, {"tag_names": TAGS}, "admin"),
+            Case("DELETE", f"{bill}/admin/1/", 2, client="admin"),
+            # ads
+            Case("GET", "/api/ads/", 1),
+            Case("POST", "/api/ads/", 1, data=ad, client="admin"),
+            Case("GET", "/api/ads/admin-view/", 1, client="admin"),
+            Case("GET", f"/api/ads/{self.ad.id}/", 1),
+            Case("PATCH", f"/api/ads/{self.ad.id}/", 2, {"weight": 2}, "admin"),
+            Case("DELETE", f"/api/ads/{self.ad.id}/", 4, client="admin"),
+            # user
+            Case("GET", "/api/user/profile/", 0),
+            Case("PATCH", "/api/user/profile/", 1, data={"first_name": "Ann"}),
+        ]
+
+    def count_queries(self, case: Case) -> int:
+        """Call case's endpoint, rolling back its writes, and count queries."""
+        client = self.clients[case.client]
+        request = getattr(client, case.method.lower())
+        # Roles and tokens are cached across requests; budget the warm path.
+        # Earlier cases may have evicted them (e.g. by saving the user).
+        for user in (self.user, self.admin):
+            user_roles(user)
+        get_token_user(self.token.key)
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                response = request(case.path, case.data, format=case.format)
+            transaction.set_rollback(True)
+
+        self.assertLess(response.status_code, 500, response.content[:500])
+        sql = "\n".join(query["sql"] for query in queries.captured_queries)
+        self.assertLessEqual(
+            len(queries), case.budget, f"{len(queries)} queries over budget:\n{sql}"
+        )
+        return len(queries)
+
+    def test_every_route_has_a_budget(self):
+        self.seed(SMALL)
+
+        budgeted = {resolve(case.path.split("?")[0]).route for case in self.cases()}
+
+        self.assertEqual(api_routes() - budgeted, set())
+
+    def test_queries_within_budget_and_independent_of_size(self):
+        self.seed(SMALL)
+        small = {}
+        for case in self.cases():
+            with self.subTest(method=case.method, path=case.path, size=SMALL):
+                small[case.method, case.path] = self.count_queries(case)
+
+        self.seed(LARGE)
+        for case in self.cases():
+            with self.subTest(method=case.method, path=case.path, size=LARGE):
+                self.assertEqual(
+                    self.count_queries(case),
+                    small[case.method, case.path],
+                    "query count grows with the data",
+                )
@@ -0,0 +1,85 @@
+"""
+Cached user roles.
+
+A user's roles are the names of their groups. They are resolved once per
+request, memoized on the user instance, and cached per user for
+USER_ROLES_CACHE_TTL seconds so that permission checks on every API call
+do not each query the groups table. Cached roles are dropped as soon as
+a user's groups change, or a group is renamed or deleted.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+User = get_user_model()
+
+ADMIN_GROUP = "admin"
+KEY_PREFIX = "user-roles"
+# Attribute memoizing roles on the user instance of a request
+MEMO_ATTR = "_cached_roles"
+
+
+def roles_key(user_id) -> str:
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def user_roles(user) -> frozenset:
+    """Names of the groups user belongs to; empty for anonymous users."""
+    if not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, MEMO_ATTR, None)
+    if roles is None:
+        key = roles_key(user.pk)
+        roles = cache.get(key)
+        if roles is None:
+            roles = frozenset(user.groups.values_list("name", flat=True))
+            cache.set(key, roles, settings.USER_ROLES_CACHE_TTL)
+        setattr(user, MEMO_ATTR, roles)
+    return roles
+
+
+def is_admin(user) -> bool:
+    """Whether user is in the 'admin' group."""
+    return ADMIN_GROUP in user_roles(user)
+
+
+def forget_roles(user_ids) -> None:
+    """Drop the cached roles of the given users."""
+    cache.delete_many([roles_key(user_id) for user_id in user_ids])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if isinstance(instance, User):
+        # user.groups.add(...) and friends; pk_set holds group ids
+        if action.startswith("post_"):
+            instance.__dict__.pop(MEMO_ATTR, None)
+            forget_roles([instance.pk])
+    elif action == "pre_clear":
+        # group.user_set.clear() does not say which users it removes
+        forget_roles(instance.user_set.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        forget_roles(pk_set)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        # Never inherit roles cached for a reused primary key
+        forget_roles([instance.pk])
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        forget_roles(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    forget_roles(instance.user_set.values_list("pk", flat=True))
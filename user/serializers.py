@@ -1,7 +1,8 @@
-from django.contrib.auth.models import Group
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from .roles import is_admin
+
 User = get_user_model()
 
 
@@ -24,7 +25,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         }
 
     def get_is_admin(self, obj):
-        return obj.groups.filter(name="admin").exists()
+        return is_admin(obj)
 
     def get_full_name(self, obj):
         return obj.get_full_name()
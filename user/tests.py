@@ -1,7 +1,11 @@
 from django.db import IntegrityError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache
 from django.test import TestCase
 
+from .roles import ADMIN_GROUP, is_admin, user_roles
+from .serializers import UserProfileSerializer
 
 User = get_user_model()
 
@@ -58,3 +62,63 @@ class UsersManagersTests(TestCase):
             User.objects.create_superuser(
                 email="super@user.com", password="foo", is_superuser=False
             )
+
+
+class UserRolesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="user@example.com", password="foo")
+        self.group = Group.objects.create(name=ADMIN_GROUP)
+
+    def fresh(self):
+        """The user as loaded by a new request, without memoized roles."""
+        return User.objects.get(pk=self.user.pk)
+
+    def test_anonymous_user_has_no_roles(self):
+        self.assertEqual(user_roles(AnonymousUser()), frozenset())
+        self.assertFalse(is_admin(AnonymousUser()))
+
+    def test_roles_are_cached_across_requests(self):
+        self.user.groups.add(self.group)
+        self.assertTrue(is_admin(self.user))
+
+        user = self.fresh()
+        with self.assertNumQueries(0):
+            self.assertTrue(is_admin(user))
+            self.assertEqual(user_roles(user), {ADMIN_GROUP})
+
+    def test_adding_and_removing_groups_invalidates(self):
+        self.assertFalse(is_admin(self.user))
+
+        self.user.groups.add(self.group)
+        self.assertTrue(is_admin(self.user))
+        self.assertTrue(is_admin(self.fresh()))
+
+        self.user.groups.remove(self.group)
+        self.assertFalse(is_admin(self.user))
+        self.assertFalse(is_admin(self.fresh()))
+
+    def test_changes_from_the_group_side_invalidate(self):
+        self.assertFalse(is_admin(self.user))
+
+        self.group.user_set.add(self.user)
+        self.assertTrue(is_admin(self.fresh()))
+
+        self.group.user_set.clear()
+        self.assertFalse(is_admin(self.fresh()))
+
+    def test_renaming_or_deleting_a_group_invalidates(self):
+        self.user.groups.add(self.group)
+        self.assertTrue(is_admin(self.fresh()))
+
+        self.group.name = "editor"
+        self.group.save()
+        self.assertEqual(user_roles(self.fresh()), {"editor"})
+
+        self.group.delete()
+        self.assertEqual(user_roles(self.fresh()), frozenset())
+
+    def test_profile_reports_admin(self):
+        self.user.groups.add(self.group)
+
+        self.assertTrue(UserProfileSerializer(self.fresh()).data["is_admin"])